@@ -1,48 +1,14 @@
 import streamlit as st
-import pandas as pd
-from joblib import load
-import numpy as np
 import os
-import shap
-
-
-
-# Cargar modelos entrenados previamente
-modelos_prestaciones = {
-    "Aguinaldo": "modelo_aguinaldo.pkl",
-    "Vacaciones con sueldo": "modelo_vacaciones.pkl",
-    "Servicio Médico": "modelo_servicio_medico.pkl",
-    "Utilidades": "modelo_utilidades.pkl",
-    "Incapacidad con sueldo": "modelo_incap_sueldo.pkl",
-    "AFORE": "modelo_afore.pkl",
-    "Crédito para vivienda": "modelo_credito_vivienda.pkl",
-}
-
-# Diccionario de modelos con nombres internos
-modelos_salario = {
-    "cualquier_discapacidad": "modelo_salario_cualquier_discapacidad.pkl",
-    "discapacidad_ver": "modelo_salario_discapacidad_ver.pkl",
-    "discapacidad_oir": "modelo_salario_discapacidad_oir.pkl",
-    "discapacidad_caminar": "modelo_salario_discapacidad_caminar.pkl",
-    "discapacidad_banarse": "modelo_salario_discapacidad_banarse.pkl",
-    "discapacidad_hablar": "modelo_salario_discapacidad_hablar.pkl",
-    "discapacidad_recordar": "modelo_salario_discapacidad_recordar.pkl",
-}
-
-# Diccionario para mostrar nombres formales
-nombres_formales = {
-    "cualquier_discapacidad": "Cualquier Discapacidad",
-    "discapacidad_ver": "Discapacidad Visual",
-    "discapacidad_oir": "Discapacidad Auditiva",
-    "discapacidad_caminar": "Discapacidad Motriz",
-    "discapacidad_banarse": "Discapacidad para Cuidarse",
-    "discapacidad_hablar": "Discapacidad del Habla",
-    "discapacidad_recordar": "Discapacidad Cognitiva",
-}
-
-
-def cargar_modelo(nombre_modelo):
-    return load(nombre_modelo)
+import sys
+import tempfile
+import time
+
+from perfilado import ACTIVO as PERFILAR_ARRANQUE, TiemposRerun, perfil_arranque
+
+inicio_render = time.perf_counter()
+# Tiempos por etapa de este rerun (panel de depuración con DEPURAR_TIEMPOS=1)
+tiempos = TiemposRerun()
 
 # Configuración de la app
 st.set_page_config(
@@ -55,7 +21,13 @@ st.set_page_config(
 st.sidebar.title("Navegación")
 seccion = st.sidebar.radio(
     "Selecciona una sección:",
-    ("Explicación y guía", "Modelos Clasificadores de Prestaciones", "Predicción de Salarios por Discapacidad")
+    (
+        "Explicación y guía",
+        "Modelos Clasificadores de Prestaciones",
+        "Predicción de Salarios por Discapacidad",
+        "Barrido por Edad y Escolaridad",
+    ),
+    key="seccion",
 )
 
 # Sección: Explicación y guía
@@ -108,6 +80,11 @@ if seccion == "Explicación y guía":
         - Ingresar información relevante como edad, género, escolaridad acumulada, y otros factores demográficos.
         - Visualizar las estimaciones del salario por hora tanto para personas con la discapacidad seleccionada como para personas sin discapacidad.
 
+        #### 3. Barrido por Edad y Escolaridad
+        En esta sección puedes:
+        - Fijar un perfil y ver cómo cambia la probabilidad de una prestación o el salario por hora a lo largo de todas las edades (18 a 99), todos los años de escolaridad (0 a 30) o ambos a la vez.
+        - Para los modelos de salario, ver la brecha entre el salario con y sin discapacidad en cada punto.
+
         ### Interpretación de Resultados
         - **Modelos Clasificadores de Prestaciones:**
           Los resultados incluyen una probabilidad estimada de recibir la prestación laboral seleccionada. Por ejemplo, una probabilidad del 0.85 indica que, según el modelo, hay un 85% de posibilidad de que tengas derecho a esa prestación.
@@ -218,10 +195,19 @@ if seccion == "Explicación y guía":
 )
 # Sección: Modelos Clasificadores de Prestaciones
 elif seccion == "Modelos Clasificadores de Prestaciones":
+    # Las dependencias pesadas se importan sólo en la sección que las usa
+    with perfil_arranque.importando(seccion), tiempos.etapa("Importaciones"):
+        from codificacion import COLUMNAS_PRESTACIONES, LOCALIDADES, REGIONES, SECTORES, VARIABLES_PRESTACIONES, codificar_para
+        from inferencia import UMBRAL_CLASE, motor_de
+        from cache_predicciones import cache_predicciones
+        from modelos import modelos_prestaciones
+        from tabla_consulta import probabilidad_prestacion
+
     st.title("Modelos Clasificadores de Prestaciones")
     modelo_seleccionado = st.sidebar.selectbox("Selecciona un Modelo", list(modelos_prestaciones.keys()))
     modelo_path = modelos_prestaciones[modelo_seleccionado]
-    modelo = cargar_modelo(modelo_path)
+    with tiempos.etapa("Cargar modelo"):
+        modelo = motor_de(modelo_path)
 
     # Entrada de datos
     st.header(f"Predicción para {modelo_seleccionado}")
@@ -233,48 +219,100 @@ elif seccion == "Modelos Clasificadores de Prestaciones":
     cualquier_discapacidad = st.selectbox("¿Tiene alguna discapacidad?", options=["No", "Sí"])
     region = st.selectbox(
         "Región de Residencia",
-        options=["Centro", "Noroeste", "Noreste", "Occidente/Bajío", "Sur"]
+        options=list(REGIONES)
     )
-    sector = st.selectbox("Sector del Trabajo", options=["Terciario", "Primario", "Secundario"])
+    sector = st.selectbox("Sector del Trabajo", options=list(SECTORES))
     localidad = st.selectbox(
         "Tamaño de Localidad (Población)",
-        options=[
-            "Menor de 2,500 habitantes", "2,500 a 14,999 habitantes", 
-            "15,000 a 49,999 habitantes", "50,000 a 99,999 habitantes", 
-            "100,000 o más habitantes"
-        ]
+        options=list(LOCALIDADES)
     )
 
-    entradas = pd.DataFrame([{
-        "edad": edad,
-        "mujer": 1 if mujer == "Mujer" else 0,
-        "escoacum": escoacum,
-        "afrodes_new": 1 if afrodes_new == "Sí" else 0,
-        "hlengua_new": 1 if hlengua_new == "Sí" else 0,
-        "cualquier_discapacidad": 1 if cualquier_discapacidad == "Sí" else 0,
-        "noroeste": 1 if region == "Noroeste" else 0,
-        "noreste": 1 if region == "Noreste" else 0,
-        "occidente_bajio": 1 if region == "Occidente/Bajío" else 0,
-        "sur": 1 if region == "Sur" else 0,
-        "act_prim": 1 if sector == "Primario" else 0,
-        "act_sec": 1 if sector == "Secundario" else 0,
-        "loc_rural": 1 if localidad == "Menor de 2,500 habitantes" else 0,
-        "loc_semirural": 1 if localidad == "2,500 a 14,999 habitantes" else 0,
-        "loc_semiurbano": 1 if localidad == "15,000 a 49,999 habitantes" else 0,
-        "loc_urbano": 1 if localidad == "50,000 a 99,999 habitantes" else 0,
-    }])
+    with tiempos.etapa("Codificar entradas"):
+        entradas = codificar_para(modelo, {
+            "edad": edad,
+            "mujer": mujer,
+            "escoacum": escoacum,
+            "afrodes_new": afrodes_new,
+            "hlengua_new": hlengua_new,
+            "cualquier_discapacidad": cualquier_discapacidad,
+            "region": region,
+            "sector": sector,
+            "localidad": localidad,
+        }, COLUMNAS_PRESTACIONES)
 
     if st.button("Predecir Prestación"):
-        prediccion = modelo.predict(entradas)[0]
-        probabilidad = modelo.predict_proba(entradas)[0, 1]
+        with tiempos.etapa("Predecir"):
+            probabilidad = cache_predicciones.predecir(
+                modelo_path, entradas, lambda X: probabilidad_prestacion(modelo_seleccionado, X)
+            )[0]
+        prediccion = int(probabilidad > UMBRAL_CLASE)
         st.write(
             f"Predicción: {'Sí tienes la prestación' if prediccion == 1 else 'No tienes la prestación'} para **{modelo_seleccionado}**."
         )
         st.write(f"Probabilidad: {probabilidad:.2f}")
+
+    # Explicación de la predicción; shap sólo se importa al activarla
+    if st.toggle("Mostrar explicación de la predicción (SHAP)"):
+        import pandas as pd
+        from explicaciones import explicar, valor_base
+
+        with tiempos.etapa("Explicación SHAP"):
+            contribuciones = explicar(modelo_seleccionado, entradas)
+        st.write(
+            "Contribución de cada variable a la predicción, en log-odds, "
+            f"a partir de un valor base de {valor_base(modelo_path):.3f}."
+        )
+        st.bar_chart(
+            pd.Series(contribuciones, index=COLUMNAS_PRESTACIONES, name="Contribución"),
+            horizontal=True,
+        )
+
+    # Predicción por lotes para todas las prestaciones
+    with st.expander("Predicción por lotes (CSV o Parquet)"):
+        st.write(
+            "Sube un archivo con las columnas `" + "`, `".join(VARIABLES_PRESTACIONES) + "`. "
+            "Se calculará la probabilidad de las siete prestaciones para cada persona."
+        )
+        archivo_lote = st.file_uploader("Archivo de personas", type=["csv", "parquet"])
+        if archivo_lote is not None and st.button("Predecir lote"):
+            from prediccion_lote import predecir_archivo
+
+            extension = os.path.splitext(archivo_lote.name)[1].lower()
+            with tempfile.TemporaryDirectory() as directorio:
+                ruta_entrada = os.path.join(directorio, "entrada" + extension)
+                ruta_salida = os.path.join(directorio, "probabilidades.csv")
+                with open(ruta_entrada, "wb") as f:
+                    f.write(archivo_lote.getbuffer())
+
+                avance = st.empty()
+                try:
+                    filas = predecir_archivo(
+                        ruta_entrada, ruta_salida,
+                        al_avanzar=lambda n: avance.write(f"{n} filas procesadas..."),
+                    )
+                except ValueError as error:
+                    st.error(str(error))
+                else:
+                    avance.write(f"{filas} filas procesadas.")
+                    with open(ruta_salida, "rb") as f:
+                        st.download_button(
+                            label="Descargar probabilidades",
+                            data=f.read(),
+                            file_name="probabilidades.csv",
+                            mime="text/csv",
+                        )
         
 
 # Sección: Predicción de Salarios por Discapacidad
 elif seccion == "Predicción de Salarios por Discapacidad":
+    with perfil_arranque.importando(seccion), tiempos.etapa("Importaciones"):
+        import numpy as np
+        from cache_predicciones import cache_predicciones
+        from codificacion import COLUMNAS_SALARIO, LOCALIDADES, REGIONES, SECTORES, codificar_para
+        from inferencia import motor_de
+        from modelos import modelos_salario, nombres_formales
+        from tabla_consulta import log_salario
+
     st.title("Predicción de Salarios por Discapacidad")
     # Mostrar nombres formales en el selector
     discapacidad_formal_seleccionada = st.sidebar.selectbox(
@@ -289,7 +327,8 @@ elif seccion == "Predicción de Salarios por Discapacidad":
 
 # Cargar el modelo correspondiente
     modelo_path = modelos_salario[discapacidad_seleccionada]
-    modelo = cargar_modelo(modelo_path)
+    with tiempos.etapa("Cargar modelo"):
+        modelo = motor_de(modelo_path)
 
     # Entrada de datos
     st.header(f"Predicción del Salario por Hora para {discapacidad_formal_seleccionada}")
@@ -300,73 +339,35 @@ elif seccion == "Predicción de Salarios por Discapacidad":
     hlengua_new = st.selectbox("¿Habla una lengua indígena?", options=["No", "Sí"])
     region = st.selectbox(
         "Región de Residencia",
-        options=["Centro", "Noroeste", "Noreste", "Occidente/Bajío", "Sur"]
+        options=list(REGIONES)
     )
-    sector = st.selectbox("Sector del Trabajo", options=["Terciario", "Primario", "Secundario"])
+    sector = st.selectbox("Sector del Trabajo", options=list(SECTORES))
     localidad = st.selectbox(
         "Tamaño de Localidad (Población)",
-        options=[
-            "Menor de 2,500 habitantes", "2,500 a 14,999 habitantes", 
-            "15,000 a 49,999 habitantes", "50,000 a 99,999 habitantes", 
-            "100,000 o más habitantes"
-        ]
+        options=list(LOCALIDADES)
     )
 
-    discapacidades = {
-        "cualquier_discapacidad": 0,
-        "discapacidad_ver": 0,
-        "discapacidad_oir": 0,
-        "discapacidad_caminar": 0,
-        "discapacidad_banarse": 0,
-        "discapacidad_hablar": 0,
-        "discapacidad_recordar": 0
-    }
-    discapacidades_con = discapacidades.copy()
-    discapacidades_con[discapacidad_seleccionada] = 1
-
-    entradas_con = pd.DataFrame([{
-        "edad": edad,
-        "mujer": 1 if mujer == "Mujer" else 0,
-        "escoacum": escoacum,
-        "afrodes_new": 1 if afrodes_new == "Sí" else 0,
-        "hlengua_new": 1 if hlengua_new == "Sí" else 0,
-        "noroeste": 1 if region == "Noroeste" else 0,
-        "noreste": 1 if region == "Noreste" else 0,
-        "occidente_bajio": 1 if region == "Occidente/Bajío" else 0,
-        "sur": 1 if region == "Sur" else 0,
-        "act_prim": 1 if sector == "Primario" else 0,
-        "act_sec": 1 if sector == "Secundario" else 0,
-        "loc_rural": 1 if localidad == "Menor de 2,500 habitantes" else 0,
-        "loc_semirural": 1 if localidad == "2,500 a 14,999 habitantes" else 0,
-        "loc_semiurbano": 1 if localidad == "15,000 a 49,999 habitantes" else 0,
-        "loc_urbano": 1 if localidad == "50,000 a 99,999 habitantes" else 0,
-        **discapacidades_con,
-    }])
-
-    entradas_sin = pd.DataFrame([{
+    perfil = {
         "edad": edad,
-        "mujer": 1 if mujer == "Mujer" else 0,
+        "mujer": mujer,
         "escoacum": escoacum,
-        "afrodes_new": 1 if afrodes_new == "Sí" else 0,
-        "hlengua_new": 1 if hlengua_new == "Sí" else 0,
-        "noroeste": 1 if region == "Noroeste" else 0,
-        "noreste": 1 if region == "Noreste" else 0,
-        "occidente_bajio": 1 if region == "Occidente/Bajío" else 0,
-        "sur": 1 if region == "Sur" else 0,
-        "act_prim": 1 if sector == "Primario" else 0,
-        "act_sec": 1 if sector == "Secundario" else 0,
-        "loc_rural": 1 if localidad == "Menor de 2,500 habitantes" else 0,
-        "loc_semirural": 1 if localidad == "2,500 a 14,999 habitantes" else 0,
-        "loc_semiurbano": 1 if localidad == "15,000 a 49,999 habitantes" else 0,
-        "loc_urbano": 1 if localidad == "50,000 a 99,999 habitantes" else 0,
-        **discapacidades,
-    }])
+        "afrodes_new": afrodes_new,
+        "hlengua_new": hlengua_new,
+        "region": region,
+        "sector": sector,
+        "localidad": localidad,
+    }
+    with tiempos.etapa("Codificar entradas"):
+        entradas_con = codificar_para(modelo, {**perfil, discapacidad_seleccionada: 1}, COLUMNAS_SALARIO)
+        entradas_sin = codificar_para(modelo, perfil, COLUMNAS_SALARIO)
 
     if st.button("Predecir Salarios"):
-        prediccion_con = modelo.predict(entradas_con)[0]
+        # Ambos escenarios en una sola llamada al modelo
+        with tiempos.etapa("Predecir"):
+            prediccion_con, prediccion_sin = cache_predicciones.predecir(
+                modelo_path, np.vstack([entradas_con, entradas_sin]), lambda X: log_salario(discapacidad_seleccionada, X)
+            )
         salario_con = np.exp(prediccion_con)
-
-        prediccion_sin = modelo.predict(entradas_sin)[0]
         salario_sin = np.exp(prediccion_sin)
 
         col1, col2 = st.columns(2)
@@ -377,22 +378,136 @@ elif seccion == "Predicción de Salarios por Discapacidad":
 
         # Crear una gráfica de barras
         st.subheader("Comparación de Salarios")
-        import matplotlib.pyplot as plt
-
-        # Datos para la gráfica
-        categorias = ["Con discapacidad", "Sin discapacidad"]
-        salarios = [salario_con, salario_sin]
-
-        # Crear la gráfica
-        fig, ax = plt.subplots()
-        ax.bar(categorias, salarios, color=['blue', 'green'])
-        ax.set_ylabel("Salario por hora (MXN)")
-        ax.set_title("Comparación de Salarios por Discapacidad")
+        from graficas import mostrar_comparacion_salarios
+
+        with tiempos.etapa("Gráfica"):
+            mostrar_comparacion_salarios(salario_con, salario_sin)
+
+    # Comparación de todas las discapacidades para el mismo perfil
+    if st.button("Comparar todas las discapacidades"):
+        from salarios import brechas_salariales
+
+        with tiempos.etapa("Comparar discapacidades"):
+            brechas = brechas_salariales(perfil)
+        st.subheader("Brecha Salarial por Tipo de Discapacidad")
+        st.dataframe(
+            brechas.style.format({
+                "Salario con discapacidad": "${:.2f}",
+                "Salario sin discapacidad": "${:.2f}",
+                "Brecha (MXN)": "${:.2f}",
+                "Brecha (%)": "{:.1f}%",
+            }),
+            hide_index=True,
+        )
+        st.bar_chart(
+            brechas.set_index("Discapacidad")[["Salario con discapacidad", "Salario sin discapacidad"]],
+            y_label="Salario por hora (MXN)",
+            stack=False,
+        )
 
-        # Agregar valores encima de las barras
-        for i, v in enumerate(salarios):
-            ax.text(i, v + 0.5, f"${v:.2f}", ha='center', fontsize=10)
+# Sección: Barrido por Edad y Escolaridad
+elif seccion == "Barrido por Edad y Escolaridad":
+    with perfil_arranque.importando(seccion), tiempos.etapa("Importaciones"):
+        import numpy as np
+        from barrido import EDADES, ESCOLARIDADES, a_tabla, barrido_prestacion, barrido_salario
+        from codificacion import LOCALIDADES, REGIONES, SECTORES
+        from graficas import especificacion_curvas, especificacion_superficie
+        from modelos import modelos_prestaciones, nombres_formales
+
+    st.title("Barrido por Edad y Escolaridad")
+    tipo_modelo = st.sidebar.radio("Tipo de modelo", ["Prestación", "Salario"])
+    if tipo_modelo == "Prestación":
+        modelo_seleccionado = st.sidebar.selectbox("Selecciona un Modelo", list(modelos_prestaciones.keys()))
+    else:
+        discapacidad_formal_seleccionada = st.sidebar.selectbox("Tipo de Discapacidad", list(nombres_formales.values()))
+        modelo_seleccionado = [
+            key for key, val in nombres_formales.items() if val == discapacidad_formal_seleccionada
+        ][0]
+
+    variable_barrido = st.radio(
+        "Variable a recorrer", ["Edad", "Escolaridad", "Edad y escolaridad"], horizontal=True
+    )
 
-        # Mostrar la gráfica en Streamlit
-        st.pyplot(fig)
- 
+    # Perfil fijo; la edad o la escolaridad sólo se usan si no se recorren
+    edad = st.number_input("Edad", min_value=18, max_value=99, value=30, disabled=variable_barrido != "Escolaridad")
+    escoacum = st.number_input(
+        "Escolaridad Acumulada (en años)", min_value=0, max_value=30, value=12, disabled=variable_barrido != "Edad"
+    )
+    mujer = st.selectbox("Género", options=["Hombre", "Mujer"])
+    afrodes_new = st.selectbox("¿Es afrodescendiente?", options=["No", "Sí"])
+    hlengua_new = st.selectbox("¿Habla una lengua indígena?", options=["No", "Sí"])
+    perfil = {
+        "edad": edad,
+        "mujer": mujer,
+        "escoacum": escoacum,
+        "afrodes_new": afrodes_new,
+        "hlengua_new": hlengua_new,
+    }
+    if tipo_modelo == "Prestación":
+        perfil["cualquier_discapacidad"] = st.selectbox("¿Tiene alguna discapacidad?", options=["No", "Sí"])
+    perfil["region"] = st.selectbox("Región de Residencia", options=list(REGIONES))
+    perfil["sector"] = st.selectbox("Sector del Trabajo", options=list(SECTORES))
+    perfil["localidad"] = st.selectbox("Tamaño de Localidad (Población)", options=list(LOCALIDADES))
+
+    edades = EDADES if variable_barrido != "Escolaridad" else np.array([edad])
+    escolaridades = ESCOLARIDADES if variable_barrido != "Edad" else np.array([escoacum])
+
+    # Toda la malla se evalúa en una sola llamada al modelo
+    with tiempos.etapa("Barrido"):
+        if tipo_modelo == "Prestación":
+            probabilidad = barrido_prestacion(modelo_seleccionado, perfil, edades, escolaridades)
+            tabla = a_tabla(edades, escolaridades, Probabilidad=probabilidad)
+            series, titulo_y, campo_superficie = ["Probabilidad"], "Probabilidad", "Probabilidad"
+        else:
+            salario_con, salario_sin, brecha = barrido_salario(modelo_seleccionado, perfil, edades, escolaridades)
+            tabla = a_tabla(
+                edades, escolaridades,
+                **{"Con discapacidad": salario_con, "Sin discapacidad": salario_sin, "Brecha (MXN)": brecha},
+            )
+            series, titulo_y, campo_superficie = (
+                ["Con discapacidad", "Sin discapacidad"], "Salario por hora (MXN)", "Brecha (MXN)"
+            )
+
+    with tiempos.etapa("Gráfica"):
+        if variable_barrido == "Edad y escolaridad":
+            st.subheader(f"{campo_superficie} para {len(edades)} edades × {len(escolaridades)} años de escolaridad")
+            st.vega_lite_chart(tabla, especificacion_superficie(campo_superficie, campo_superficie))
+        else:
+            eje = "edad" if variable_barrido == "Edad" else "escoacum"
+            st.subheader(f"{titulo_y} por {variable_barrido.lower()}")
+            st.vega_lite_chart(tabla, especificacion_curvas(eje, series, titulo_y))
+            if tipo_modelo == "Salario":
+                st.subheader("Brecha salarial en cada punto")
+                st.vega_lite_chart(tabla, especificacion_curvas(eje, ["Brecha (MXN)"], "Brecha (MXN)"))
+
+    with st.expander("Ver datos del barrido"):
+        st.dataframe(tabla, hide_index=True)
+
+# Tiempos de carga y memoria de los modelos compartidos por el proceso
+with st.sidebar.expander("Estado de los modelos"):
+    from modelos import registro
+
+    estadisticas_modelos = registro.estadisticas()
+    if estadisticas_modelos:
+        import pandas as pd
+
+        st.dataframe(pd.DataFrame(estadisticas_modelos), hide_index=True)
+    else:
+        st.write("Aún no se ha cargado ningún modelo.")
+
+    # Caché de predicciones compartida por las sesiones del proceso
+    if "cache_predicciones" in sys.modules:
+        st.write("Caché de predicciones")
+        st.dataframe([sys.modules["cache_predicciones"].cache_predicciones.estadisticas()], hide_index=True)
+
+perfil_arranque.registrar_render(seccion, inicio_render)
+
+# Reporte de importaciones y tiempos de render por sección
+if PERFILAR_ARRANQUE:
+    with st.sidebar.expander("Perfil de arranque"):
+        st.dataframe(perfil_arranque.reporte(), hide_index=True)
+
+# Tiempos de cada etapa del rerun actual
+if tiempos.activo:
+    with st.sidebar.expander("Tiempos de este rerun", expanded=True):
+        st.dataframe(tiempos.reporte(), hide_index=True, column_config={"ms": st.column_config.NumberColumn(format="%.1f")})
@@ -0,0 +1,198 @@
+"""Exportación de los modelos a un formato compacto que se abre como memoria mapeada.
+
+Por cada ``.pkl`` se generan:
+
+- ``<modelo>.ubj``: el booster en el formato binario nativo de XGBoost (UBJSON),
+  independiente de la versión de scikit-learn y de pickle.
+- ``<modelo>.<campo>.npy``: un arreglo contiguo por campo de los nodos de todos
+  los árboles (``izquierdo``, ``derecho``, ``variable``, ``umbral``,
+  ``por_defecto``), con el mismo tipo con el que los indexa el evaluador
+  compilado de ``inferencia.py``. Se abren con ``mmap_mode="r"``, así que los
+  procesos de la app comparten las mismas páginas del archivo en lugar de
+  tener cada uno su copia deserializada. Los modelos que el evaluador
+  compilado no soporta sólo exportan el booster.
+
+``manifiesto.json`` registra la versión del formato, las columnas de cada
+modelo, la huella SHA-256 del ``.pkl`` de origen y de cada archivo exportado.
+Los artefactos sólo se usan si la huella del ``.pkl`` coincide.
+
+Para exportar:
+    python artefactos.py
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from inferencia import ArbolesCompilados, MotorInferencia, compilar_arboles
+from modelos import DIRECTORIO, cargar_modelo, registro
+
+
+DIRECTORIO_ARTEFACTOS = os.path.join(DIRECTORIO, "artefactos")
+VERSION_FORMATO = 2
+
+# Un archivo por campo: un arreglo estructurado obligaría al evaluador a
+# recorrer vistas no contiguas, bastante más lentas al evaluar pocas filas
+TIPOS_NODO = {
+    "izquierdo": np.int64,
+    "derecho": np.int64,
+    "variable": np.int64,
+    "umbral": np.float32,
+    "por_defecto": np.bool_,
+}
+
+
+def _sha256(ruta):
+    with open(ruta, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _nombre_base(ruta):
+    return os.path.splitext(os.path.basename(ruta))[0]
+
+
+def exportar(directorio=DIRECTORIO_ARTEFACTOS, rutas=None):
+    import xgboost
+
+    os.makedirs(directorio, exist_ok=True)
+    modelos = {}
+    for ruta in rutas or registro.rutas:
+        booster = cargar_modelo(ruta).get_booster()
+        base = _nombre_base(ruta)
+
+        archivo_booster = f"{base}.ubj"
+        booster.save_model(os.path.join(directorio, archivo_booster))
+
+        arboles = compilar_arboles(booster)
+        compilado, archivos_nodos = None, {}
+        if arboles is not None:
+            for campo, tipo in TIPOS_NODO.items():
+                archivos_nodos[campo] = f"{base}.{campo}.npy"
+                np.save(os.path.join(directorio, archivos_nodos[campo]), np.ascontiguousarray(getattr(arboles, campo), tipo))
+            compilado = {
+                "transformacion": arboles.transformacion,
+                "margen_base": float(arboles.margen_base),
+                "profundidad": int(arboles.profundidad),
+                "raices": arboles.raices.tolist(),
+                "nodos": archivos_nodos,
+            }
+
+        modelos[ruta] = {
+            "huella_origen": registro.huella(ruta),
+            "columnas": booster.feature_names,
+            "booster": archivo_booster,
+            # None si el modelo se evalúa sólo con el booster
+            "compilado": compilado,
+            "archivos": {
+                nombre: {
+                    "ruta": nombre,
+                    "sha256": _sha256(os.path.join(directorio, nombre)),
+                    "bytes": os.path.getsize(os.path.join(directorio, nombre)),
+                }
+                for nombre in (archivo_booster, *archivos_nodos.values())
+            },
+        }
+
+    manifiesto = {
+        "version_formato": VERSION_FORMATO,
+        "xgboost": xgboost.__version__,
+        "creado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "modelos": modelos,
+    }
+    with open(os.path.join(directorio, "manifiesto.json"), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    return manifiesto
+
+
+class MotorArtefacto(MotorInferencia):
+    """Motor de inferencia construido desde los artefactos exportados.
+
+    Los árboles compilados viven en memoria mapeada; el booster nativo sólo
+    se carga la primera vez que se evalúa un lote grande (o la primera
+    predicción, si el modelo no tiene árboles compilados).
+    """
+
+    def __init__(self, directorio, entrada):
+        self.directorio = directorio
+        self.feature_names = entrada["columnas"]
+        # Tamaño en disco de los archivos del modelo, para las estadísticas del registro
+        self.bytes_archivos = sum(archivo["bytes"] for archivo in entrada["archivos"].values())
+        self._archivo_booster = entrada["booster"]
+        self.compilado = None
+        compilado = entrada["compilado"]
+        if compilado is not None:
+            # Se indexan como ndarray y no como np.memmap, que agrega trabajo a cada indexación
+            nodos = {
+                campo: np.load(os.path.join(directorio, archivo), mmap_mode="r").view(np.ndarray)
+                for campo, archivo in compilado["nodos"].items()
+            }
+            self.compilado = ArbolesCompilados.desde_arreglos(
+                nodos["izquierdo"], nodos["derecho"], nodos["variable"], nodos["umbral"],
+                nodos["por_defecto"], np.asarray(compilado["raices"], dtype=np.int64),
+                compilado["margen_base"], compilado["transformacion"], compilado["profundidad"],
+            )
+        self._booster = None
+        self._candado = threading.Lock()
+
+    @property
+    def booster(self):
+        if self._booster is None:
+            with self._candado:
+                if self._booster is None:
+                    import xgboost
+
+                    self._booster = xgboost.Booster(model_file=os.path.join(self.directorio, self._archivo_booster))
+        return self._booster
+
+
+class Artefactos:
+    def __init__(self, directorio=DIRECTORIO_ARTEFACTOS):
+        self.directorio = directorio
+        with open(os.path.join(directorio, "manifiesto.json"), encoding="utf-8") as f:
+            self.manifiesto = json.load(f)
+
+    def verificar(self, ruta):
+        # El artefacto corresponde al .pkl actual y sus archivos no están dañados
+        entrada = self.manifiesto["modelos"].get(ruta)
+        if self.manifiesto.get("version_formato") != VERSION_FORMATO or entrada is None:
+            return False
+        if entrada["huella_origen"] != registro.huella(ruta):
+            return False
+        return all(
+            _sha256(os.path.join(self.directorio, archivo["ruta"])) == archivo["sha256"]
+            for archivo in entrada["archivos"].values()
+        )
+
+    def motor(self, ruta):
+        return MotorArtefacto(self.directorio, self.manifiesto["modelos"][ruta])
+
+
+def version_artefactos(directorio=DIRECTORIO_ARTEFACTOS):
+    # Fecha de modificación del manifiesto; None si no hay artefactos exportados
+    try:
+        return os.stat(os.path.join(directorio, "manifiesto.json")).st_mtime_ns
+    except OSError:
+        return None
+
+
+def motor_artefacto(ruta, directorio=DIRECTORIO_ARTEFACTOS):
+    """Motor desde los artefactos si existen y corresponden al .pkl actual; None en otro caso.
+
+    Verifica las huellas en cada llamada; ``inferencia.motor_de`` guarda el
+    resultado en el registro de modelos para no repetirlo.
+    """
+    try:
+        artefactos = Artefactos(directorio)
+        return artefactos.motor(ruta) if artefactos.verificar(ruta) else None
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+if __name__ == "__main__":
+    manifiesto = exportar(sys.argv[1] if len(sys.argv) > 1 else DIRECTORIO_ARTEFACTOS)
+    total = sum(a["bytes"] for m in manifiesto["modelos"].values() for a in m["archivos"].values())
+    print(f"{len(manifiesto['modelos'])} modelos exportados ({total / 2**20:.1f} MB)")
@@ -0,0 +1,53 @@
+"""Barridos de edad y escolaridad para un perfil fijo.
+
+La malla de entradas (hasta 82 edades × 31 años de escolaridad) se arma con
+broadcasting de NumPy a partir de una sola fila codificada, sin ciclos de
+Python, y se evalúa con una sola llamada al modelo.
+"""
+import numpy as np
+import pandas as pd
+
+from codificacion import COLUMNAS_PRESTACIONES, COLUMNAS_SALARIO, RANGOS, codificar
+from tabla_consulta import log_salario, probabilidad_prestacion
+
+
+EDADES = np.arange(RANGOS["edad"][0], RANGOS["edad"][1] + 1)
+ESCOLARIDADES = np.arange(RANGOS["escoacum"][0], RANGOS["escoacum"][1] + 1)
+
+
+def malla(perfil, columnas, edades=EDADES, escolaridades=ESCOLARIDADES):
+    """Matriz de entrada con una fila por cada par (edad, escolaridad).
+
+    Las filas recorren primero la escolaridad y luego la edad, así que el
+    resultado de un modelo se lleva a la superficie con
+    ``reshape(len(edades), len(escolaridades))``.
+    """
+    fila = codificar(perfil, columnas)[0]
+    X = np.empty((len(edades), len(escolaridades), len(columnas)), dtype=np.float32)
+    X[...] = fila
+    X[:, :, columnas.index("edad")] = np.asarray(edades)[:, None]
+    X[:, :, columnas.index("escoacum")] = np.asarray(escolaridades)[None, :]
+    return X.reshape(-1, len(columnas))
+
+
+def barrido_prestacion(prestacion, perfil, edades=EDADES, escolaridades=ESCOLARIDADES):
+    X = malla(perfil, COLUMNAS_PRESTACIONES, edades, escolaridades)
+    return probabilidad_prestacion(prestacion, X).reshape(len(edades), len(escolaridades))
+
+
+def barrido_salario(discapacidad, perfil, edades=EDADES, escolaridades=ESCOLARIDADES):
+    """Salario por hora con y sin la discapacidad, y la brecha, en cada punto de la malla."""
+    sin = malla(perfil, COLUMNAS_SALARIO, edades, escolaridades)
+    con = sin.copy()
+    con[:, COLUMNAS_SALARIO.index(discapacidad)] = 1
+    salarios = np.exp(log_salario(discapacidad, np.vstack([con, sin])))
+    salario_con, salario_sin = salarios.reshape(2, len(edades), len(escolaridades))
+    return salario_con, salario_sin, salario_sin - salario_con
+
+
+def a_tabla(edades, escolaridades, **superficies):
+    # Superficies de forma (edades, escolaridades) a una tabla larga para graficar
+    edad, escoacum = np.meshgrid(edades, escolaridades, indexing="ij")
+    datos = {"edad": edad.ravel(), "escoacum": escoacum.ravel()}
+    datos.update({nombre: np.ravel(valores) for nombre, valores in superficies.items()})
+    return pd.DataFrame(datos)
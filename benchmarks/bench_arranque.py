@@ -0,0 +1,87 @@
+"""Tiempo hasta el primer render de cada sección de la app.
+
+Cada medición corre en un intérprete nuevo, así que incluye las importaciones
+y la carga de modelos que haría un contenedor recién levantado.
+
+Uso:
+    python benchmarks/bench_arranque.py --repeticiones 3 --json arranque.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RAIZ, "app.py")
+
+SECCIONES = [
+    "Explicación y guía",
+    "Modelos Clasificadores de Prestaciones",
+    "Predicción de Salarios por Discapacidad",
+    "Barrido por Edad y Escolaridad",
+]
+
+# Se ejecuta en un proceso nuevo por cada medición
+_MEDICION = """
+import json, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_s = time.perf_counter() - inicio
+
+app = AppTest.from_file(sys.argv[1], default_timeout=300)
+app.session_state["seccion"] = sys.argv[2]
+inicio = time.perf_counter()
+app.run()
+primer_render_s = time.perf_counter() - inicio
+if app.exception:
+    sys.exit(app.exception[0].value)
+
+inicio = time.perf_counter()
+app.run()
+segundo_render_s = time.perf_counter() - inicio
+print(json.dumps({
+    "streamlit_s": streamlit_s,
+    "primer_render_s": primer_render_s,
+    "segundo_render_s": segundo_render_s,
+    "modulos_cargados": len(sys.modules),
+}))
+"""
+
+
+def medir(seccion, app=APP):
+    salida = subprocess.run(
+        [sys.executable, "-c", _MEDICION, app, seccion],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(app),
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Tiempo hasta el primer render por sección.")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    args = parser.parse_args(argumentos)
+
+    resultados = []
+    for seccion in SECCIONES:
+        mediciones = [medir(seccion) for _ in range(args.repeticiones)]
+        resultado = {"seccion": seccion}
+        for campo in mediciones[0]:
+            resultado[campo] = statistics.median(m[campo] for m in mediciones)
+        resultados.append(resultado)
+        print(
+            f"{seccion:45s} primer render {resultado['primer_render_s']:.2f} s, "
+            f"segundo {resultado['segundo_render_s']:.3f} s, "
+            f"{resultado['modulos_cargados']:.0f} módulos"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
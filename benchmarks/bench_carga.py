@@ -0,0 +1,132 @@
+"""Tiempo de carga y memoria de los modelos: pickle contra artefactos exportados.
+
+Cada medición corre en un intérprete nuevo y carga los 14 modelos por una de
+tres vías:
+
+- ``pickle``: ``joblib.load`` de cada ``.pkl`` (lo que hacía la app).
+- ``artefactos``: los árboles compilados en memoria mapeada, con
+  ``artefactos.motor_artefacto`` (verifica las huellas del ``.pkl`` y de
+  cada archivo exportado antes de abrirlos).
+- ``artefactos+booster``: lo anterior más el booster ``.ubj`` de cada modelo.
+
+Se reporta el tiempo, el aumento de RSS y el de memoria anónima del proceso
+(``Anonymous`` de ``/proc/self/smaps_rollup``), y la latencia de predecir una
+sola fila (mediana por modelo, promediada sobre los 14 modelos), que es el
+caso de la app y con los artefactos pasa por los árboles en memoria mapeada. Las páginas mapeadas de los
+artefactos cuentan en el RSS pero no como anónimas: son páginas del archivo
+que el sistema comparte entre todos los procesos que lo abren.
+
+Uso:
+    python artefactos.py
+    python benchmarks/bench_carga.py --repeticiones 3 --json carga.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODOS = ["pickle", "artefactos", "artefactos+booster"]
+
+# Se ejecuta en un proceso nuevo por cada medición
+_MEDICION = """
+import json, statistics, sys, time
+sys.path.insert(0, sys.argv[1])
+import numpy as np
+import xgboost
+
+def memoria():
+    campos = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) == 3 and partes[2] == "kB":
+                campos[partes[0].rstrip(":")] = int(partes[1]) / 1024
+    return campos["Rss"], campos["Anonymous"]
+
+from modelos import registro
+from artefactos import motor_artefacto
+modo = sys.argv[2]
+rss_antes, anonima_antes = memoria()
+inicio = time.perf_counter()
+if modo == "pickle":
+    from joblib import load
+    modelos = [load(ruta) for ruta in registro.rutas]
+else:
+    # Mismo camino que la app: incluye verificar las huellas SHA-256
+    modelos = [motor_artefacto(ruta) for ruta in registro.rutas]
+    if modo == "artefactos+booster":
+        [m.booster for m in modelos]
+carga_s = time.perf_counter() - inicio
+
+def predictor(modelo):
+    # Probabilidad en los clasificadores y valor en los regresores, por cada vía
+    if modo == "pickle":
+        X = np.zeros((1, modelo.n_features_in_), dtype=np.float32)
+        return getattr(modelo, "predict_proba", modelo.predict), X
+    return modelo.predecir, np.zeros((1, len(modelo.feature_names)), dtype=np.float32)
+
+# Una predicción por modelo para tocar las páginas que se usan al evaluar
+predictores = [predictor(modelo) for modelo in modelos]
+for predecir, X in predictores:
+    predecir(X)
+rss, anonima = memoria()
+
+def latencia(predecir, X, veces=200):
+    tiempos = []
+    for _ in range(veces):
+        inicio = time.perf_counter()
+        predecir(X)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+print(json.dumps({
+    "carga_s": carga_s,
+    "rss_mb": rss - rss_antes,
+    "anonima_mb": anonima - anonima_antes,
+    "latencia_ms": statistics.mean(latencia(predecir, X) for predecir, X in predictores) * 1000,
+}))
+"""
+
+
+def medir(modo, raiz=RAIZ):
+    salida = subprocess.run(
+        [sys.executable, "-c", _MEDICION, raiz, modo],
+        capture_output=True, text=True, check=True, cwd=raiz,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Carga de modelos: pickle contra artefactos.")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    args = parser.parse_args(argumentos)
+
+    if not os.path.exists(os.path.join(RAIZ, "artefactos", "manifiesto.json")):
+        sys.exit("No hay artefactos exportados; ejecuta primero: python artefactos.py")
+
+    resultados = []
+    for modo in MODOS:
+        mediciones = [medir(modo) for _ in range(args.repeticiones)]
+        resultado = {"modo": modo}
+        for campo in mediciones[0]:
+            resultado[campo] = statistics.median(m[campo] for m in mediciones)
+        resultados.append(resultado)
+        print(
+            f"{modo:20s} carga {resultado['carga_s'] * 1000:7.1f} ms, "
+            f"RSS +{resultado['rss_mb']:6.1f} MB, anónima +{resultado['anonima_mb']:6.1f} MB, "
+            f"1 fila {resultado['latencia_ms']:.3f} ms"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
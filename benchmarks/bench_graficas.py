@@ -0,0 +1,109 @@
+"""Regresión de fugas de memoria en las gráficas de salarios.
+
+Simula miles de clics en "Predecir Salarios" en un servidor de larga
+duración y verifica que la memoria de Python no crezca ni queden figuras de
+matplotlib abiertas. Se mide en dos partes:
+
+- ``--renders`` (5000): construye y serializa a JSON la especificación de
+  Vega-Lite de la comparación de salarios, que es lo que cada clic envía al
+  navegador. Es barato, así que cubre miles de renders.
+- ``--reruns`` (300): hace clic en "Predecir Salarios" sobre la app real con
+  ``streamlit.testing.v1.AppTest``, así que cada clic es un rerun completo
+  (predicción, caché y ``st.vega_lite_chart`` en la sesión). Cada rerun tarda
+  unos 250 ms, por eso son menos.
+
+Uso:
+    python benchmarks/bench_graficas.py --renders 5000 --reruns 300
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from graficas import especificacion_comparacion  # noqa: E402
+
+
+APP = os.path.join(RAIZ, "app.py")
+SECCION = "Predicción de Salarios por Discapacidad"
+
+CRECIMIENTO_MAXIMO_MB = 1.0
+# El calentamiento recorre todas las edades, así que después de él la caché
+# de predicciones ya no crece
+EDADES = range(18, 100)
+CALENTAMIENTO = 2 * len(EDADES)
+
+
+def figuras_abiertas():
+    # Sólo cuenta si algo importó matplotlib durante la prueba
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    return len(pyplot.get_fignums()) if pyplot is not None else 0
+
+
+def medir(nombre, dibujar, veces, calentamiento):
+    """Crecimiento de memoria en MB de ``veces`` llamadas a ``dibujar(i)``."""
+    for i in range(calentamiento):
+        dibujar(i)
+
+    # Cada rerun de AppTest deja ciclos de referencias; se recolectan antes de
+    # medir para que sólo cuente la memoria que sigue viva
+    tracemalloc.start()
+    gc.collect()
+    inicial, _ = tracemalloc.get_traced_memory()
+    inicio = time.perf_counter()
+    for i in range(veces):
+        dibujar(i)
+    segundos = time.perf_counter() - inicio
+    gc.collect()
+    final, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    crecimiento = (final - inicial) / 2**20
+    print(f"{nombre}: {veces} en {segundos:.2f} s ({1e3 * segundos / veces:.3f} ms c/u), "
+          f"crecimiento {crecimiento:.3f} MB (pico {pico / 2**20:.3f} MB)")
+    return crecimiento
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Regresión de fugas de memoria en las gráficas.")
+    parser.add_argument("--renders", type=int, default=5000, help="Especificaciones construidas y serializadas")
+    parser.add_argument("--reruns", type=int, default=300, help="Clics en la app real con AppTest")
+    parser.add_argument("--crecimiento-maximo-mb", type=float, default=CRECIMIENTO_MAXIMO_MB)
+    args = parser.parse_args(argumentos)
+
+    def especificacion(i):
+        json.dumps(especificacion_comparacion(20 + (i % 500) / 100, 25 + (i % 700) / 100))
+
+    crecimientos = [medir("Especificaciones", especificacion, args.renders, 200)]
+
+    os.chdir(RAIZ)
+    app = AppTest.from_file(APP, default_timeout=120)
+    app.session_state["seccion"] = SECCION
+    app.run()
+
+    def rerun(i):
+        app.number_input[0].set_value(EDADES[i % len(EDADES)])
+        next(b for b in app.button if b.label == "Predecir Salarios").click()
+        app.run()
+        if app.exception:
+            sys.exit(app.exception[0].value)
+        if len(app.get("vega_lite_chart")) != 1:
+            sys.exit("El rerun no dibujó la gráfica de salarios")
+
+    crecimientos.append(medir("Reruns de la app", rerun, args.reruns, CALENTAMIENTO))
+    print(f"Figuras de matplotlib abiertas: {figuras_abiertas()}")
+
+    if max(crecimientos) > args.crecimiento_maximo_mb or figuras_abiertas():
+        print("FALLA: la memoria crece con cada render")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Latencia, rendimiento y memoria de cada modelo con entradas sintéticas.
+
+Las entradas se generan dentro de los rangos y opciones de los campos de la
+app (``codificacion.perfil_aleatorio``). Cada modelo se mide en un intérprete
+nuevo, por el mismo camino que usa la app (``motor_de``):
+
+- ``carga_ms``: obtener el motor del modelo en frío.
+- ``codificar_ms`` / ``latencia_ms``: codificar y predecir una sola fila
+  (mediana de muchas repeticiones; también el percentil 95 de la predicción).
+- ``filas_por_s_<n>``: rendimiento de la predicción por lotes de ``n`` filas.
+- ``pico_mb``: pico de RSS del proceso sobre el que tenía antes de cargar el
+  modelo, al terminar el lote más grande. Incluye importar XGBoost, que con
+  los artefactos exportados sólo ocurre con el primer lote grande.
+
+Cada modelo se mide en ``--rondas`` intérpretes nuevos, repartidos a lo largo
+de la corrida, y se guarda la mediana de cada métrica, así que un periodo de
+ruido de la máquina no mueve la línea base ni dispara una regresión.
+
+Con ``--linea-base`` los resultados se comparan contra un archivo guardado y
+el programa termina con error si alguna métrica empeora más que
+``--tolerancia``; en las métricas de tiempo y memoria además debe empeorar
+más que un mínimo absoluto, para no reportar ruido de milisegundos. La
+línea base guarda una entrada por modelo y por motor (``MotorInferencia`` con
+los ``.pkl``, ``MotorArtefacto`` con los artefactos exportados) y cada modelo
+se compara contra la de su mismo motor; si ningún modelo tiene línea base
+para el motor con que se midió, el programa también termina con error.
+``--guardar`` sobre un archivo existente sólo reemplaza las entradas de los
+modelos y motores medidos.
+
+Uso:
+    python benchmarks/bench_inferencia.py --linea-base benchmarks/linea_base_inferencia.json
+    python benchmarks/bench_inferencia.py --guardar benchmarks/linea_base_inferencia.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from modelos import modelos_prestaciones, modelos_salario  # noqa: E402
+
+
+TAMANOS_LOTE = [1_000, 10_000, 100_000]
+
+# Métricas en las que un valor menor es mejor (en el resto, mayor es mejor) y el
+# empeoramiento absoluto por debajo del cual un cambio se considera ruido
+_MINIMOS = {
+    "carga_ms": 5.0,
+    "codificar_ms": 0.05,
+    "latencia_ms": 0.1,
+    "latencia_p95_ms": 0.2,
+    "pico_mb": 1.0,
+}
+# En el rendimiento por lotes, el mínimo es sobre el tiempo de cada lote
+_MINIMO_LOTE_MS = 20.0
+
+# Se ejecuta en un proceso nuevo por cada modelo
+_MEDICION = """
+import json, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+import numpy as np
+from codificacion import COLUMNAS_PRESTACIONES, COLUMNAS_SALARIO, codificar, perfil_aleatorio
+from inferencia import motor_de
+from modelos import modelos_prestaciones
+
+ruta, repeticiones, tamanos = sys.argv[2], int(sys.argv[3]), json.loads(sys.argv[4])
+columnas = COLUMNAS_PRESTACIONES if ruta in modelos_prestaciones.values() else COLUMNAS_SALARIO
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+
+def cronometrar(funcion, veces):
+    tiempos = []
+    for _ in range(veces):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return np.array(tiempos)
+
+perfiles = perfil_aleatorio(max(tamanos), semilla=0)
+antes_mb = rss_mb()
+inicio = time.perf_counter()
+motor = motor_de(ruta)
+resultado = {"motor": type(motor).__name__, "carga_ms": (time.perf_counter() - inicio) * 1000}
+
+# Una sola fila, como en la app
+fila = {variable: valores[0] for variable, valores in perfiles.items()}
+X = codificar(fila, columnas)
+motor.predecir(X)
+resultado["codificar_ms"] = float(np.median(cronometrar(lambda: codificar(fila, columnas), repeticiones))) * 1000
+latencias = cronometrar(lambda: motor.predecir(X), repeticiones) * 1000
+resultado["latencia_ms"] = float(np.median(latencias))
+resultado["latencia_p95_ms"] = float(np.percentile(latencias, 95))
+
+X_total = codificar(perfiles, columnas)
+for tamano in tamanos:
+    lote = X_total[:tamano]
+    veces = max(3, min(repeticiones, 100_000 // tamano))
+    resultado[f"filas_por_s_{tamano}"] = tamano / float(np.median(cronometrar(lambda: motor.predecir(lote), veces)))
+resultado["pico_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - antes_mb
+print(json.dumps(resultado))
+"""
+
+
+def medir(ruta, repeticiones=200, tamanos=TAMANOS_LOTE, raiz=RAIZ):
+    salida = subprocess.run(
+        [sys.executable, "-c", _MEDICION, raiz, ruta, str(repeticiones), json.dumps(tamanos)],
+        capture_output=True, text=True, check=True, cwd=raiz,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def _clave(resultado):
+    return resultado["modelo"], resultado.get("motor")
+
+
+def comparar(resultados, linea_base, tolerancia):
+    """Métricas que empeoraron más que ``tolerancia`` (fracción) respecto a la línea base.
+
+    Devuelve las regresiones y los modelos que no se compararon porque la
+    línea base no tiene una entrada de ese modelo con el mismo motor.
+    """
+    base = {_clave(r): r for r in linea_base}
+    regresiones, omitidos = [], []
+    for resultado in resultados:
+        anterior = base.get(_clave(resultado))
+        if anterior is None:
+            omitidos.append(_clave(resultado))
+            continue
+        for metrica, valor in resultado.items():
+            if not isinstance(valor, float) or not isinstance(anterior.get(metrica), (int, float)):
+                continue
+            if metrica in _MINIMOS:
+                if valor - anterior[metrica] < _MINIMOS[metrica]:
+                    continue
+                cambio = valor / max(anterior[metrica], 1e-9) - 1
+            else:
+                filas = int(metrica.rsplit("_", 1)[1])
+                if (filas / max(valor, 1e-9) - filas / max(anterior[metrica], 1e-9)) * 1000 < _MINIMO_LOTE_MS:
+                    continue
+                cambio = anterior[metrica] / max(valor, 1e-9) - 1
+            if cambio > tolerancia:
+                regresiones.append((resultado["modelo"], metrica, anterior[metrica], valor))
+    return regresiones, omitidos
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Latencia, rendimiento y memoria de cada modelo.")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--rondas", type=int, default=3, help="Intérpretes nuevos por modelo (se usa la mediana)")
+    parser.add_argument("--modelo", action="append", help="Medir sólo estos modelos (.pkl)")
+    parser.add_argument("--linea-base", help="Archivo JSON con resultados anteriores para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="Empeoramiento relativo permitido antes de reportar una regresión")
+    parser.add_argument("--guardar", help="Archivo donde guardar los resultados (p. ej. una nueva línea base)")
+    args = parser.parse_args(argumentos)
+
+    rutas = args.modelo or list(modelos_prestaciones.values()) + list(modelos_salario.values())
+    # Las rondas recorren todos los modelos, así que las de un mismo modelo
+    # quedan separadas en el tiempo y no comparten un mismo periodo de ruido
+    rondas = [[medir(ruta, args.repeticiones) for ruta in rutas] for _ in range(args.rondas)]
+    resultados = []
+    for i, ruta in enumerate(rutas):
+        mediciones = [ronda[i] for ronda in rondas]
+        resultado = {"modelo": ruta, "motor": mediciones[0]["motor"]}
+        for metrica in mediciones[0]:
+            if metrica != "motor":
+                resultado[metrica] = statistics.median(m[metrica] for m in mediciones)
+        resultados.append(resultado)
+        print(
+            f"{ruta:45s} carga {resultado['carga_ms']:7.1f} ms, "
+            f"1 fila {resultado['latencia_ms']:.3f} ms (p95 {resultado['latencia_p95_ms']:.3f}), "
+            + ", ".join(f"{n} filas {resultado[f'filas_por_s_{n}']:,.0f}/s" for n in TAMANOS_LOTE)
+            + f", pico +{resultado['pico_mb']:.1f} MB"
+        )
+
+    if args.guardar:
+        # Se conservan las entradas de los otros motores y modelos no medidos
+        guardados = {}
+        if os.path.exists(args.guardar):
+            with open(args.guardar, encoding="utf-8") as f:
+                guardados = {_clave(r): r for r in json.load(f)}
+        guardados.update({_clave(r): r for r in resultados})
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump(list(guardados.values()), f, ensure_ascii=False, indent=2)
+
+    if args.linea_base:
+        with open(args.linea_base, encoding="utf-8") as f:
+            regresiones, omitidos = comparar(resultados, json.load(f), args.tolerancia)
+        for modelo, motor in omitidos:
+            print(f"SIN COMPARAR {modelo}: la línea base no tiene mediciones con {motor}")
+        for modelo, metrica, antes, ahora in regresiones:
+            print(f"REGRESIÓN {modelo} {metrica}: {antes:.4g} -> {ahora:.4g}")
+        if len(omitidos) == len(resultados):
+            sys.exit(f"FALLA: ningún modelo se comparó; guarda una línea base con {resultados[0]['motor']} "
+                     f"usando --guardar {args.linea_base}")
+        if regresiones:
+            sys.exit(1)
+        print(f"Sin regresiones mayores a {args.tolerancia:.0%} respecto a {args.linea_base} "
+              f"({len(resultados) - len(omitidos)} de {len(resultados)} modelos comparados)")
+
+
+if __name__ == "__main__":
+    main()
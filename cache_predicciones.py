@@ -0,0 +1,182 @@
+"""Caché de predicciones compartida por todas las sesiones del proceso.
+
+La clave de cada predicción es la huella del modelo (SHA-256 del ``.pkl``,
+así que cambia si el archivo cambia) más la fila ya codificada por
+``codificacion.codificar``; como la codificación normaliza las entradas,
+"Sí", "si" y 1 dan la misma clave. Las entradas se descartan por antigüedad
+(TTL) o, al llenarse la caché, la menos usada recientemente (LRU).
+
+Si ``CACHE_PREDICCIONES_DISCO`` apunta a un archivo, las predicciones también
+se guardan en una base SQLite que sobrevive a los reinicios. Cuando la base
+llega a su límite se borran las predicciones vencidas y, si aún sobran, las
+más antiguas hasta dejar un 10% libre.
+
+Variables de entorno:
+    CACHE_PREDICCIONES_MAX        Número máximo de predicciones en memoria (10000).
+    CACHE_PREDICCIONES_TTL_S      Vigencia en segundos; 0 para no expirar (3600).
+    CACHE_PREDICCIONES_DISCO      Ruta del archivo SQLite (sin caché en disco).
+    CACHE_PREDICCIONES_DISCO_MAX  Número máximo de predicciones en disco (1000000).
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from modelos import registro
+
+
+MAX_ENTRADAS = int(os.environ.get("CACHE_PREDICCIONES_MAX", "10000"))
+TTL = float(os.environ.get("CACHE_PREDICCIONES_TTL_S", "3600"))
+RUTA_DISCO = os.environ.get("CACHE_PREDICCIONES_DISCO") or None
+MAX_DISCO = int(os.environ.get("CACHE_PREDICCIONES_DISCO_MAX", "1000000"))
+
+
+def _clave(huella, fila):
+    return hashlib.blake2b(fila.tobytes(), digest_size=16, key=huella.encode()[:64]).digest()
+
+
+class _Disco:
+    """Segundo nivel de la caché en un archivo SQLite."""
+
+    def __init__(self, ruta, ttl, max_entradas=MAX_DISCO):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._candado = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS predicciones (clave BLOB PRIMARY KEY, valor REAL, creado REAL)"
+        )
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS predicciones_creado ON predicciones (creado)")
+        with self._candado:
+            self._podar()
+
+    def leer(self, claves):
+        minimo = time.time() - self.ttl if self.ttl > 0 else float("-inf")
+        marcas = ",".join("?" * len(claves))
+        with self._candado:
+            filas = self._conexion.execute(
+                f"SELECT clave, valor FROM predicciones WHERE clave IN ({marcas}) AND creado >= ?",
+                [*claves, minimo],
+            ).fetchall()
+        return dict(filas)
+
+    def escribir(self, pares):
+        ahora = time.time()
+        with self._candado:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO predicciones VALUES (?, ?, ?)",
+                [(clave, valor, ahora) for clave, valor in pares],
+            )
+            # Cota superior de las filas (los reemplazos también suman); sólo se
+            # cuentan de verdad cuando podría pasar del límite
+            self._filas += len(pares)
+            if self._filas > self.max_entradas:
+                self._podar()
+
+    def _podar(self):
+        # Borra las vencidas y, si aún sobran, las más antiguas hasta dejar un
+        # 10% libre, para no podar en cada escritura; se llama con el candado tomado
+        if self.ttl > 0:
+            self._conexion.execute("DELETE FROM predicciones WHERE creado < ?", (time.time() - self.ttl,))
+        (self._filas,) = self._conexion.execute("SELECT COUNT(*) FROM predicciones").fetchone()
+        if self._filas > self.max_entradas:
+            conservar = self.max_entradas - self.max_entradas // 10
+            self._conexion.execute(
+                "DELETE FROM predicciones WHERE rowid IN "
+                "(SELECT rowid FROM predicciones ORDER BY creado LIMIT ?)",
+                (self._filas - conservar,),
+            )
+            self._filas = conservar
+
+    def limpiar(self):
+        with self._candado:
+            self._conexion.execute("DELETE FROM predicciones")
+            self._filas = 0
+
+
+class CachePredicciones:
+    """Caché LRU con vigencia para predicciones de una fila por modelo."""
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, ttl=TTL, ruta_disco=RUTA_DISCO, max_disco=MAX_DISCO):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.disco = _Disco(ruta_disco, ttl, max_disco) if ruta_disco else None
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+        self._contadores = dict.fromkeys(("aciertos", "aciertos_disco", "fallos", "desalojos", "expiraciones"), 0)
+
+    def predecir(self, ruta, X, evaluar):
+        """Predicción de cada fila de ``X`` con el modelo ``ruta``.
+
+        Sólo las filas que no están en la caché se pasan, juntas, a
+        ``evaluar``, que debe devolver un valor por fila.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        huella = registro.huella(ruta)
+        claves = [_clave(huella, fila) for fila in X]
+        resultado = np.empty(len(claves), dtype=np.float64)
+
+        faltan = []
+        ahora = time.monotonic()
+        with self._candado:
+            for i, clave in enumerate(claves):
+                entrada = self._entradas.get(clave)
+                if entrada is not None and entrada[1] < ahora:
+                    del self._entradas[clave]
+                    self._contadores["expiraciones"] += 1
+                    entrada = None
+                if entrada is None:
+                    faltan.append(i)
+                    continue
+                self._entradas.move_to_end(clave)
+                resultado[i] = entrada[0]
+                self._contadores["aciertos"] += 1
+
+        if faltan and self.disco is not None:
+            guardados = self.disco.leer([claves[i] for i in faltan])
+            if guardados:
+                for i in faltan:
+                    if claves[i] in guardados:
+                        resultado[i] = guardados[claves[i]]
+                self._guardar([(claves[i], resultado[i]) for i in faltan if claves[i] in guardados], "aciertos_disco")
+                faltan = [i for i in faltan if claves[i] not in guardados]
+
+        if faltan:
+            resultado[faltan] = np.asarray(evaluar(X[faltan]), dtype=np.float64)
+            nuevos = [(claves[i], float(resultado[i])) for i in faltan]
+            self._guardar(nuevos, "fallos")
+            if self.disco is not None:
+                self.disco.escribir(nuevos)
+        return resultado
+
+    def _guardar(self, pares, contador):
+        expira = time.monotonic() + self.ttl if self.ttl > 0 else float("inf")
+        with self._candado:
+            self._contadores[contador] += len(pares)
+            for clave, valor in pares:
+                self._entradas[clave] = (valor, expira)
+                self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self._contadores["desalojos"] += 1
+
+    def estadisticas(self):
+        with self._candado:
+            datos = dict(self._contadores, entradas=len(self._entradas))
+        consultas = datos["aciertos"] + datos["aciertos_disco"] + datos["fallos"]
+        datos["tasa_aciertos"] = (datos["aciertos"] + datos["aciertos_disco"]) / consultas if consultas else 0.0
+        return datos
+
+    def limpiar(self):
+        with self._candado:
+            self._entradas.clear()
+        if self.disco is not None:
+            self.disco.limpiar()
+
+
+cache_predicciones = CachePredicciones()
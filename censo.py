@@ -0,0 +1,257 @@
+"""Evaluación de los 14 modelos sobre los microdatos del censo en varios procesos.
+
+El archivo de entrada (CSV o Parquet, con las mismas columnas que la
+predicción por lotes) se lee por bloques y cada bloque se evalúa en un grupo
+de procesos; cada proceso carga los modelos una sola vez al iniciar. Por
+cada persona se calcula:
+
+- ``prob_<prestación>``: probabilidad de las siete prestaciones.
+- ``log_salario_con_<discapacidad>`` y ``log_salario_sin_<discapacidad>``:
+  logaritmo del salario por hora con y sin cada discapacidad, como en la app.
+
+Las filas se escriben en un archivo Parquet por bloque (``filas/``), así que
+la memoria no crece con el tamaño del censo. Cada bloque deja además sus
+sumas parciales por región y tamaño de localidad (``agregados/``); al final
+se combinan en ``agregados.csv`` con el número de personas, la probabilidad
+media de cada prestación, el logaritmo medio del salario y la brecha media.
+
+Un bloque sólo se marca como terminado cuando sus dos archivos están
+completos; si la corrida se interrumpe, al volver a ejecutarla con el mismo
+directorio de salida se omiten los bloques terminados.
+
+Uso:
+    python censo.py censo.parquet resultados_censo --procesos 8 --tamano-bloque 200000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from codificacion import COLUMNAS_PRESTACIONES, COLUMNAS_SALARIO, VARIABLES_ENTRADA, codificar, validar_columnas
+from inferencia import motor_de
+from modelos import modelos_prestaciones, modelos_salario, registro
+from prediccion_lote import COLUMNAS_ENTRADA, columna_probabilidad, leer_por_bloques, predecir_bloque
+
+
+TAMANO_BLOQUE = 200_000
+VERSION_ESTADO = 1
+
+CLAVES_AGREGADO = ["region", "localidad"]
+
+# Motores de cada proceso de trabajo; se cargan en _iniciar_trabajador
+_motores_prestaciones = None
+_motores_salario = None
+
+
+def columnas_salario(discapacidad):
+    return f"log_salario_con_{discapacidad}", f"log_salario_sin_{discapacidad}"
+
+
+def columnas_resultado():
+    columnas = [columna_probabilidad(p) for p in modelos_prestaciones]
+    for discapacidad in modelos_salario:
+        columnas += columnas_salario(discapacidad)
+    return columnas
+
+
+def _iniciar_trabajador(hilos):
+    global _motores_prestaciones, _motores_salario
+    _motores_prestaciones = {nombre: motor_de(ruta) for nombre, ruta in modelos_prestaciones.items()}
+    _motores_salario = {nombre: motor_de(ruta) for nombre, ruta in modelos_salario.items()}
+    # Cada proceso usa pocos hilos para no competir con los demás procesos
+    for motor in [*_motores_prestaciones.values(), *_motores_salario.values()]:
+        motor.booster.set_param({"nthread": hilos})
+
+
+def evaluar_bloque(bloque, motores_prestaciones, motores_salario):
+    resultado = predecir_bloque(bloque, motores_prestaciones)
+
+    # El escenario "sin" no tiene ninguna discapacidad; el "con", sólo la del modelo
+    sin = codificar({v: resultado[v].to_numpy() for v in VARIABLES_ENTRADA}, COLUMNAS_SALARIO)
+    for discapacidad, motor in motores_salario.items():
+        con = sin.copy()
+        con[:, COLUMNAS_SALARIO.index(discapacidad)] = 1
+        predicciones = motor.predecir(np.vstack([con, sin]))
+        columna_con, columna_sin = columnas_salario(discapacidad)
+        resultado[columna_con] = predicciones[:len(sin)]
+        resultado[columna_sin] = predicciones[len(sin):]
+    return resultado
+
+
+def sumas_parciales(resultado):
+    grupos = resultado.groupby(CLAVES_AGREGADO, sort=False)
+    sumas = grupos[columnas_resultado()].sum()
+    sumas.insert(0, "personas", grupos.size())
+    return sumas.reset_index()
+
+
+def _escribir_parquet(tabla, ruta):
+    # Se escribe a un archivo temporal y se renombra para no dejar archivos a medias
+    temporal = ruta + ".tmp"
+    tabla.to_parquet(temporal, index=False)
+    os.replace(temporal, ruta)
+
+
+def _nombre_parte(numero):
+    return f"parte-{numero:05d}.parquet"
+
+
+def _procesar_bloque(numero, bloque, directorio):
+    inicio = time.perf_counter()
+    resultado = evaluar_bloque(bloque, _motores_prestaciones, _motores_salario)
+    _escribir_parquet(resultado, os.path.join(directorio, "filas", _nombre_parte(numero)))
+    # El archivo de agregados es la marca de bloque terminado, así que va al final
+    _escribir_parquet(sumas_parciales(resultado), os.path.join(directorio, "agregados", _nombre_parte(numero)))
+    return numero, len(bloque), time.perf_counter() - inicio
+
+
+def _estado(entrada, tamano_bloque):
+    informacion = os.stat(entrada)
+    return {
+        "version": VERSION_ESTADO,
+        "entrada": os.path.abspath(entrada),
+        "bytes_entrada": informacion.st_size,
+        "modificado_entrada": informacion.st_mtime_ns,
+        "tamano_bloque": tamano_bloque,
+        "modelos": {ruta: registro.huella(ruta) for ruta in registro.rutas},
+    }
+
+
+def _preparar_directorio(directorio, estado, reiniciar):
+    ruta_estado = os.path.join(directorio, "estado.json")
+    if reiniciar and os.path.isdir(directorio):
+        for subdirectorio in ("filas", "agregados"):
+            shutil.rmtree(os.path.join(directorio, subdirectorio), ignore_errors=True)
+        for archivo in ("estado.json", "agregados.csv"):
+            if os.path.exists(os.path.join(directorio, archivo)):
+                os.remove(os.path.join(directorio, archivo))
+
+    if os.path.exists(ruta_estado):
+        with open(ruta_estado, encoding="utf-8") as f:
+            anterior = json.load(f)
+        if anterior != estado:
+            raise ValueError(
+                f"El directorio {directorio} tiene una corrida con otra entrada, otro tamaño de bloque "
+                "u otros modelos; usa --reiniciar para descartarla."
+            )
+    for subdirectorio in ("filas", "agregados"):
+        os.makedirs(os.path.join(directorio, subdirectorio), exist_ok=True)
+    with open(ruta_estado, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2)
+
+    return {
+        int(nombre[len("parte-"):-len(".parquet")])
+        for nombre in os.listdir(os.path.join(directorio, "agregados"))
+        if nombre.startswith("parte-") and nombre.endswith(".parquet")
+    }
+
+
+def combinar_agregados(directorio):
+    """Combina las sumas parciales de todos los bloques en promedios por grupo."""
+    carpeta = os.path.join(directorio, "agregados")
+    partes = [pd.read_parquet(os.path.join(carpeta, n)) for n in sorted(os.listdir(carpeta)) if n.endswith(".parquet")]
+    if not partes:
+        return pd.DataFrame(columns=CLAVES_AGREGADO + ["personas"])
+    sumas = pd.concat(partes).groupby(CLAVES_AGREGADO).sum()
+
+    agregados = sumas[["personas"]].copy()
+    for columna in columnas_resultado():
+        agregados[columna.replace("prob_", "prob_media_", 1).replace("log_salario_", "log_salario_medio_", 1)] = (
+            sumas[columna] / sumas["personas"]
+        )
+    for discapacidad in modelos_salario:
+        columna_con, columna_sin = columnas_salario(discapacidad)
+        agregados[f"brecha_log_{discapacidad}"] = (sumas[columna_sin] - sumas[columna_con]) / sumas["personas"]
+    return agregados.reset_index()
+
+
+def procesar_censo(entrada, directorio, procesos=None, tamano_bloque=TAMANO_BLOQUE, hilos_por_proceso=1,
+                   reiniciar=False, al_avanzar=None):
+    """Evalúa el censo y devuelve los agregados por región y tamaño de localidad.
+
+    ``al_avanzar(bloque, filas_bloque, filas_total)`` se llama al terminar cada bloque.
+    """
+    for ruta in modelos_prestaciones.values():
+        validar_columnas(motor_de(ruta), COLUMNAS_PRESTACIONES)
+    for ruta in modelos_salario.values():
+        validar_columnas(motor_de(ruta), COLUMNAS_SALARIO)
+
+    terminados = _preparar_directorio(directorio, _estado(entrada, tamano_bloque), reiniciar)
+    procesos = procesos or os.cpu_count() or 1
+    filas_total = 0
+
+    def terminar(futuros):
+        nonlocal filas_total
+        for futuro in futuros:
+            numero, filas, _ = futuro.result()
+            filas_total += filas
+            if al_avanzar is not None:
+                al_avanzar(numero, filas, filas_total)
+
+    # "spawn" evita heredar hilos de OpenMP del proceso principal
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_iniciar_trabajador,
+        initargs=(hilos_por_proceso,),
+    ) as grupo:
+        pendientes = set()
+        for numero, bloque in enumerate(leer_por_bloques(entrada, tamano_bloque)):
+            if numero in terminados:
+                filas_total += len(bloque)
+                continue
+            faltantes = [c for c in COLUMNAS_ENTRADA if c not in bloque.columns]
+            if faltantes:
+                raise ValueError(f"Faltan columnas en el archivo de entrada: {', '.join(faltantes)}")
+            # Pocos bloques en espera a la vez para que la memoria no dependa del archivo
+            if len(pendientes) >= 2 * procesos:
+                hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                terminar(hechos)
+            pendientes.add(grupo.submit(_procesar_bloque, numero, bloque, directorio))
+        terminar(wait(pendientes).done)
+
+    agregados = combinar_agregados(directorio)
+    agregados.to_csv(os.path.join(directorio, "agregados.csv"), index=False)
+    return agregados
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Evaluación de los 14 modelos sobre los microdatos del censo.")
+    parser.add_argument("entrada", help="Archivo CSV o Parquet con las columnas: " + ", ".join(COLUMNAS_ENTRADA))
+    parser.add_argument("salida", help="Directorio de resultados (filas, agregados y punto de control)")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos de trabajo (por omisión, uno por CPU)")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE, help="Filas por bloque")
+    parser.add_argument("--hilos-por-proceso", type=int, default=1, help="Hilos de XGBoost en cada proceso")
+    parser.add_argument("--reiniciar", action="store_true", help="Descarta una corrida anterior en el directorio")
+    args = parser.parse_args(argumentos)
+
+    inicio = time.perf_counter()
+    procesadas = 0
+
+    def reportar(bloque, filas_bloque, filas_total):
+        # La velocidad sólo cuenta las filas evaluadas en esta corrida, no las retomadas
+        nonlocal procesadas
+        procesadas += filas_bloque
+        segundos = time.perf_counter() - inicio
+        print(f"Bloque {bloque} listo ({filas_bloque} filas); {filas_total} filas en total, "
+              f"{procesadas / segundos:,.0f} filas/s", flush=True)
+
+    try:
+        agregados = procesar_censo(
+            args.entrada, args.salida, args.procesos, args.tamano_bloque, args.hilos_por_proceso,
+            reiniciar=args.reiniciar, al_avanzar=reportar,
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"Listo en {time.perf_counter() - inicio:.1f} s: {int(agregados['personas'].sum())} personas en "
+          f"{len(agregados)} grupos; agregados en {os.path.join(args.salida, 'agregados.csv')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Codificación de las variables de entrada en la matriz que esperan los modelos.
+
+Las opciones de región, sector y tamaño de localidad son las mismas que se
+muestran en la app; cada una (excepto la categoría base) se convierte en una
+columna indicadora. El resultado es una matriz ``float32`` contigua con las
+columnas en el orden exacto con el que se entrenaron los modelos.
+"""
+import numpy as np
+
+
+# Opciones de los selectores y la columna indicadora de cada una;
+# la categoría base (None) no tiene columna
+REGIONES = {
+    "Centro": None,
+    "Noroeste": "noroeste",
+    "Noreste": "noreste",
+    "Occidente/Bajío": "occidente_bajio",
+    "Sur": "sur",
+}
+SECTORES = {
+    "Terciario": None,
+    "Primario": "act_prim",
+    "Secundario": "act_sec",
+}
+LOCALIDADES = {
+    "Menor de 2,500 habitantes": "loc_rural",
+    "2,500 a 14,999 habitantes": "loc_semirural",
+    "15,000 a 49,999 habitantes": "loc_semiurbano",
+    "50,000 a 99,999 habitantes": "loc_urbano",
+    "100,000 o más habitantes": None,
+}
+
+DISCAPACIDADES = [
+    "cualquier_discapacidad",
+    "discapacidad_ver",
+    "discapacidad_oir",
+    "discapacidad_caminar",
+    "discapacidad_banarse",
+    "discapacidad_hablar",
+    "discapacidad_recordar",
+]
+
+_INDICADORAS = (
+    ["noroeste", "noreste", "occidente_bajio", "sur"]
+    + ["act_prim", "act_sec"]
+    + ["loc_rural", "loc_semirural", "loc_semiurbano", "loc_urbano"]
+)
+
+# Orden de columnas de los clasificadores de prestaciones
+COLUMNAS_PRESTACIONES = [
+    "edad", "mujer", "escoacum", "afrodes_new", "hlengua_new", "cualquier_discapacidad",
+] + _INDICADORAS
+
+# Orden de columnas de los modelos de salario
+COLUMNAS_SALARIO = [
+    "edad", "mujer", "escoacum", "afrodes_new", "hlengua_new",
+] + _INDICADORAS + DISCAPACIDADES
+
+# Variables crudas que se reciben de la app o de un archivo
+VARIABLES_ENTRADA = [
+    "edad", "mujer", "escoacum", "afrodes_new", "hlengua_new", "region", "sector", "localidad",
+]
+VARIABLES_PRESTACIONES = VARIABLES_ENTRADA + ["cualquier_discapacidad"]
+
+_CATEGORICAS = {"region": REGIONES, "sector": SECTORES, "localidad": LOCALIDADES}
+_ORIGEN_INDICADORA = {
+    columna: (variable, opcion)
+    for variable, opciones in _CATEGORICAS.items()
+    for opcion, columna in opciones.items()
+    if columna is not None
+}
+_BINARIAS = {"mujer", "afrodes_new", "hlengua_new", *DISCAPACIDADES}
+_NUMERICAS = {"edad", "escoacum"}
+
+# Etiquetas aceptadas en las variables binarias, además de los números 0 y 1
+VALORES_SI = {"1", "1.0", "sí", "si", "mujer", "true"}
+VALORES_NO = {"0", "0.0", "no", "hombre", "false"}
+
+# Rangos de los campos numéricos de la app (incluyen ambos extremos); codificar
+# rechaza los valores fuera de ellos
+RANGOS = {"edad": (18, 99), "escoacum": (0, 30)}
+
+
+def _binaria(valores, variable):
+    valores = np.asarray(valores)
+    if valores.dtype.kind in "biuf":
+        invalidos = valores[(valores != 0) & (valores != 1)]
+        if invalidos.size:
+            raise ValueError(f"Valores no válidos para '{variable}': {', '.join(map(str, np.unique(invalidos)[:10]))}")
+        return valores == 1
+    textos = valores.astype(str)
+    etiquetas = np.char.lower(np.char.strip(textos))
+    si = np.isin(etiquetas, list(VALORES_SI))
+    invalidas = textos[~si & ~np.isin(etiquetas, list(VALORES_NO))]
+    if invalidas.size:
+        raise ValueError(f"Valores no válidos para '{variable}': {', '.join(np.unique(invalidas)[:10])}")
+    return si
+
+
+def _numerica(valores, variable):
+    # Edad y escolaridad: números enteros y finitos dentro de los rangos de la app
+    valores = np.asarray(valores)
+    # True y False se convertirían en 1 y 0 sin avisar
+    if valores.dtype.kind == "b" or (valores.dtype.kind == "O" and any(isinstance(v, bool) for v in valores.flat)):
+        raise ValueError(f"La variable '{variable}' debe ser numérica")
+    try:
+        numeros = np.asarray(valores, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f"La variable '{variable}' debe ser numérica") from None
+    if not np.isfinite(numeros).all() or (numeros != np.round(numeros)).any():
+        raise ValueError(f"La variable '{variable}' debe contener números enteros, sin valores faltantes")
+    minimo, maximo = RANGOS[variable]
+    fuera = numeros[(numeros < minimo) | (numeros > maximo)]
+    if fuera.size:
+        raise ValueError(
+            f"La variable '{variable}' debe estar entre {minimo} y {maximo}; se recibió "
+            + ", ".join(f"{v:g}" for v in np.unique(fuera)[:10])
+        )
+    return numeros
+
+
+def codificar(perfil, columnas=COLUMNAS_PRESTACIONES):
+    """Convierte variables crudas en la matriz de entrada de un modelo.
+
+    ``perfil`` es un diccionario (o DataFrame) con las variables de
+    ``VARIABLES_ENTRADA`` y, opcionalmente, las de ``DISCAPACIDADES``; las
+    discapacidades ausentes valen 0. Cada valor puede ser un escalar o un
+    arreglo: los escalares se repiten para todas las filas.
+    """
+    faltantes = [v for v in VARIABLES_ENTRADA if v not in perfil]
+    if faltantes:
+        raise ValueError(f"Faltan variables de entrada: {', '.join(faltantes)}")
+
+    # Todas las variables se llevan a la misma longitud
+    nombres = VARIABLES_ENTRADA + [d for d in DISCAPACIDADES if d in perfil]
+    valores = np.broadcast_arrays(*(np.atleast_1d(np.asarray(perfil[n])) for n in nombres))
+    valores = dict(zip(nombres, valores))
+    filas = valores["edad"].shape[0]
+
+    for variable, opciones in _CATEGORICAS.items():
+        desconocidas = set(np.unique(valores[variable].astype(str))) - set(opciones)
+        if desconocidas:
+            raise ValueError(f"Valores no válidos para '{variable}': {', '.join(sorted(desconocidas))}")
+    for variable in _NUMERICAS:
+        valores[variable] = _numerica(valores[variable], variable)
+    for variable in _BINARIAS & set(valores):
+        valores[variable] = _binaria(valores[variable], variable)
+
+    matriz = np.zeros((filas, len(columnas)), dtype=np.float32)
+    for j, columna in enumerate(columnas):
+        if columna in _NUMERICAS:
+            matriz[:, j] = valores[columna]
+        elif columna in _BINARIAS:
+            if columna in valores:
+                matriz[:, j] = valores[columna]
+        elif columna in _ORIGEN_INDICADORA:
+            variable, opcion = _ORIGEN_INDICADORA[columna]
+            matriz[:, j] = valores[variable] == opcion
+        else:
+            raise ValueError(f"Columna desconocida para el codificador: '{columna}'")
+    return matriz
+
+
+def perfil_aleatorio(filas, semilla=0):
+    """Perfiles sintéticos dentro de los rangos y opciones que ofrece la app."""
+    aleatorio = np.random.default_rng(semilla)
+    perfil = {
+        variable: aleatorio.integers(minimo, maximo + 1, filas)
+        for variable, (minimo, maximo) in RANGOS.items()
+    }
+    for variable in ("mujer", "afrodes_new", "hlengua_new", *DISCAPACIDADES):
+        perfil[variable] = aleatorio.integers(0, 2, filas)
+    for variable, opciones in _CATEGORICAS.items():
+        perfil[variable] = aleatorio.choice(list(opciones), filas)
+    return perfil
+
+
+def columnas_modelo(modelo):
+    nombres = getattr(modelo, "feature_names_in_", None)
+    if nombres is None and hasattr(modelo, "get_booster"):
+        nombres = modelo.get_booster().feature_names
+    if nombres is None:
+        # Booster de XGBoost o motor de inferencia
+        nombres = getattr(modelo, "feature_names", None)
+    return None if nombres is None else [str(n) for n in nombres]
+
+
+def validar_columnas(modelo, columnas):
+    # Verifica que el modelo guardado espera exactamente estas columnas y en este orden
+    esperadas = columnas_modelo(modelo)
+    if esperadas is not None and esperadas != list(columnas):
+        raise ValueError(
+            "El orden de columnas del modelo no coincide con el codificador: "
+            f"se esperaba {esperadas} y se obtuvo {list(columnas)}"
+        )
+
+
+def codificar_para(modelo, perfil, columnas):
+    validar_columnas(modelo, columnas)
+    return codificar(perfil, columnas)
@@ -0,0 +1,45 @@
+"""Contribución de cada variable a las predicciones de prestaciones (SHAP).
+
+``shap`` tarda varios segundos en importarse, así que sólo se importa la
+primera vez que alguien pide una explicación. El ``TreeExplainer`` de cada
+modelo se construye una vez por versión del modelo y las explicaciones de un
+perfil se memorizan.
+"""
+import functools
+
+import numpy as np
+
+from modelos import modelos_prestaciones, registro
+
+
+def _construir_explicador(modelo):
+    import shap
+
+    return shap.TreeExplainer(modelo)
+
+
+def explicador_de(ruta):
+    return registro.obtener_derivado(ruta, "explicador", _construir_explicador)
+
+
+def valor_base(ruta):
+    # Margen (log-odds) esperado del modelo antes de considerar las variables
+    return float(np.ravel(explicador_de(ruta).expected_value)[0])
+
+
+def valores_shap(ruta, X):
+    """Contribuciones en log-odds para una matriz codificada, de forma (filas, columnas)."""
+    valores = explicador_de(ruta).shap_values(np.ascontiguousarray(X, dtype=np.float32))
+    return np.asarray(valores, dtype=np.float64).reshape(len(X), -1)
+
+
+@functools.lru_cache(maxsize=1024)
+def _explicar_fila(ruta, version, fila):
+    return valores_shap(ruta, np.asarray([fila], dtype=np.float32))[0]
+
+
+def explicar(prestacion, X):
+    """Contribuciones de la primera fila de ``X``; se memorizan por perfil y versión del modelo."""
+    ruta = modelos_prestaciones[prestacion]
+    fila = tuple(float(v) for v in np.asarray(X)[0])
+    return _explicar_fila(ruta, registro.version(ruta), fila).copy()
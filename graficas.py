@@ -0,0 +1,81 @@
+"""Gráficas de la app con Vega-Lite, el motor nativo de Streamlit.
+
+Las gráficas se describen como un diccionario que el navegador dibuja, así que
+el servidor no crea figuras de matplotlib que haya que cerrar y la memoria no
+crece con cada clic.
+"""
+import streamlit as st
+
+
+COLORES = {"Con discapacidad": "blue", "Sin discapacidad": "green"}
+
+
+def especificacion_comparacion(salario_con, salario_sin):
+    datos = [
+        {"grupo": "Con discapacidad", "salario": float(salario_con), "etiqueta": f"${salario_con:.2f}"},
+        {"grupo": "Sin discapacidad", "salario": float(salario_sin), "etiqueta": f"${salario_sin:.2f}"},
+    ]
+    eje_x = {"field": "grupo", "type": "nominal", "title": None, "axis": {"labelAngle": 0}}
+    eje_y = {"field": "salario", "type": "quantitative", "title": "Salario por hora (MXN)"}
+    return {
+        "title": "Comparación de Salarios por Discapacidad",
+        "data": {"values": datos},
+        "layer": [
+            {
+                "mark": "bar",
+                "encoding": {
+                    "x": eje_x,
+                    "y": eje_y,
+                    "color": {
+                        "field": "grupo",
+                        "scale": {"domain": list(COLORES), "range": list(COLORES.values())},
+                        "legend": None,
+                    },
+                },
+            },
+            {
+                # Valores encima de las barras
+                "mark": {"type": "text", "dy": -8, "fontSize": 12},
+                "encoding": {"x": eje_x, "y": eje_y, "text": {"field": "etiqueta"}},
+            },
+        ],
+    }
+
+
+def mostrar_comparacion_salarios(salario_con, salario_sin):
+    st.vega_lite_chart(especificacion_comparacion(salario_con, salario_sin))
+
+
+_TITULOS_EJE = {"edad": "Edad", "escoacum": "Escolaridad acumulada (años)"}
+
+
+# Las especificaciones siguientes no incluyen los datos: la tabla se pasa
+# aparte a st.vega_lite_chart y viaja al navegador en formato Arrow
+
+
+def especificacion_curvas(eje, series, titulo_y):
+    """Una línea por cada columna de ``series`` a lo largo de ``eje``."""
+    return {
+        "transform": [{"fold": list(series), "as": ["serie", "valor"]}],
+        "mark": {"type": "line", "point": True},
+        "encoding": {
+            "x": {"field": eje, "type": "quantitative", "title": _TITULOS_EJE[eje]},
+            "y": {"field": "valor", "type": "quantitative", "title": titulo_y},
+            "color": {"field": "serie", "type": "nominal", "title": None, "sort": list(series)},
+            "tooltip": [{"field": eje}, {"field": "serie"}, {"field": "valor", "format": ".3f"}],
+        },
+    }
+
+
+def especificacion_superficie(campo, titulo):
+    # Mapa de calor de ``campo`` sobre la malla de edad y escolaridad
+    return {
+        "mark": "rect",
+        "encoding": {
+            "x": {"field": "escoacum", "type": "ordinal", "title": _TITULOS_EJE["escoacum"]},
+            "y": {"field": "edad", "type": "ordinal", "title": _TITULOS_EJE["edad"], "sort": "descending",
+                  "axis": {"values": list(range(20, 100, 10))}},
+            "color": {"field": campo, "type": "quantitative", "title": titulo, "scale": {"scheme": "viridis"}},
+            "tooltip": [{"field": "edad"}, {"field": "escoacum"}, {"field": campo, "format": ".3f"}],
+        },
+    }
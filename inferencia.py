@@ -0,0 +1,229 @@
+"""Motor de inferencia para los modelos XGBoost de la app.
+
+En lugar de pasar por ``predict`` y ``predict_proba`` del envoltorio de
+scikit-learn (dos recorridos completos de los árboles, cada uno con su propia
+conversión a ``DMatrix``), el motor extrae el booster una sola vez, calcula la
+probabilidad en un solo recorrido y obtiene la clase a partir de ella.
+
+Opcionalmente los árboles se compilan a arreglos planos de NumPy
+(``ArbolesCompilados``) para evaluar pocas filas con muy baja latencia. Los
+modelos que el evaluador compilado no soporta (otros objetivos, divisiones
+categóricas) se evalúan siempre con el booster nativo.
+
+Para comparar los caminos (incluidos los artefactos exportados, si existen)
+contra los modelos originales:
+    python inferencia.py --verificar
+"""
+import json
+import sys
+
+import numpy as np
+
+from modelos import registro
+
+
+# Objetivos soportados y la transformación del margen a la predicción final
+_OBJETIVOS = {
+    "binary:logistic": "logistica",
+    "reg:logistic": "logistica",
+    "reg:squarederror": "identidad",
+    "reg:linear": "identidad",
+}
+
+# Por debajo de este número de filas se usan los árboles compilados
+FILAS_COMPILADO = 64
+
+UMBRAL_CLASE = 0.5
+
+
+def _sigmoide(margen):
+    return 1.0 / (1.0 + np.exp(-margen))
+
+
+def _leer_flotante(texto):
+    # Las versiones recientes de XGBoost guardan base_score como "[5E-1]"
+    return float(str(texto).strip("[]").split(",")[0])
+
+
+class ArbolesCompilados:
+    """Evaluador de árboles en NumPy puro.
+
+    Todos los árboles se concatenan en arreglos planos (hijo izquierdo,
+    hijo derecho, variable, umbral, dirección por defecto); las hojas apuntan
+    a sí mismas, así que basta avanzar todas las filas y todos los árboles a
+    la vez tantas veces como la profundidad máxima.
+    """
+
+    def __init__(self, booster):
+        modelo = json.loads(booster.save_raw("json"))
+        aprendiz = modelo["learner"]
+        objetivo = aprendiz["objective"]["name"]
+        if objetivo not in _OBJETIVOS:
+            raise NotImplementedError(f"Objetivo no soportado por el evaluador compilado: {objetivo}")
+        self.transformacion = _OBJETIVOS[objetivo]
+
+        base = _leer_flotante(aprendiz["learner_model_param"]["base_score"])
+        self.margen_base = np.log(base / (1.0 - base)) if self.transformacion == "logistica" else base
+
+        izquierdos, derechos, variables, umbrales, por_defecto, raices = [], [], [], [], [], []
+        desplazamiento = 0
+        for arbol in aprendiz["gradient_booster"]["model"]["trees"]:
+            if any(tipo != 0 for tipo in arbol.get("split_type", [])):
+                raise NotImplementedError("El evaluador compilado no soporta divisiones categóricas")
+            izquierdo = np.asarray(arbol["left_children"], dtype=np.int64)
+            derecho = np.asarray(arbol["right_children"], dtype=np.int64)
+            nodos = np.arange(len(izquierdo))
+            hoja = izquierdo == -1
+            izquierdos.append(np.where(hoja, nodos, izquierdo) + desplazamiento)
+            derechos.append(np.where(hoja, nodos, derecho) + desplazamiento)
+            variables.append(np.where(hoja, 0, arbol["split_indices"]))
+            # En las hojas, split_conditions guarda el valor de la hoja
+            umbrales.append(arbol["split_conditions"])
+            por_defecto.append(arbol["default_left"])
+            raices.append(desplazamiento)
+            desplazamiento += len(izquierdo)
+
+        self.izquierdo = np.concatenate(izquierdos)
+        self.derecho = np.concatenate(derechos)
+        self.variable = np.concatenate(variables).astype(np.int64)
+        # XGBoost compara en float32: x < umbral va a la izquierda
+        self.umbral = np.concatenate(umbrales).astype(np.float32)
+        self.por_defecto = np.concatenate(por_defecto).astype(bool)
+        self.raices = np.asarray(raices, dtype=np.int64)
+        self.profundidad = self._profundidad_maxima()
+
+    @classmethod
+    def desde_arreglos(cls, izquierdo, derecho, variable, umbral, por_defecto, raices,
+                       margen_base, transformacion, profundidad):
+        # Reconstruye el evaluador sin volver a leer el booster (p. ej. desde arreglos mapeados)
+        arboles = cls.__new__(cls)
+        arboles.izquierdo, arboles.derecho, arboles.variable = izquierdo, derecho, variable
+        arboles.umbral, arboles.por_defecto, arboles.raices = umbral, por_defecto, raices
+        arboles.margen_base = margen_base
+        arboles.transformacion = transformacion
+        arboles.profundidad = profundidad
+        return arboles
+
+    def _profundidad_maxima(self):
+        nodos = self.raices.copy()
+        profundidad = 0
+        while True:
+            siguientes = self.izquierdo[nodos]
+            siguientes = np.concatenate([siguientes, self.derecho[nodos]])
+            siguientes = np.unique(siguientes[~np.isin(siguientes, nodos)])
+            if siguientes.size == 0:
+                return profundidad
+            nodos = siguientes
+            profundidad += 1
+
+    def margen(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        filas = np.arange(X.shape[0])[:, None]
+        nodos = np.broadcast_to(self.raices, (X.shape[0], self.raices.size))
+        for _ in range(self.profundidad):
+            valores = X[filas, self.variable[nodos]]
+            izquierda = np.where(np.isnan(valores), self.por_defecto[nodos], valores < self.umbral[nodos])
+            nodos = np.where(izquierda, self.izquierdo[nodos], self.derecho[nodos])
+        return self.margen_base + self.umbral[nodos].sum(axis=1, dtype=np.float64)
+
+    def predecir(self, X):
+        margen = self.margen(X)
+        return _sigmoide(margen) if self.transformacion == "logistica" else margen
+
+
+def compilar_arboles(booster):
+    # None si el evaluador compilado no soporta el modelo
+    try:
+        return ArbolesCompilados(booster)
+    except NotImplementedError:
+        return None
+
+
+class MotorInferencia:
+    """Predicción en un solo recorrido a partir del booster de un modelo."""
+
+    def __init__(self, modelo, compilar=True):
+        self.booster = modelo.get_booster()
+        self.feature_names = self.booster.feature_names
+        self.compilado = compilar_arboles(self.booster) if compilar else None
+
+    def predecir(self, X):
+        # Probabilidad de la clase 1 en los clasificadores, valor predicho en los regresores
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if self.compilado is not None and X.shape[0] <= FILAS_COMPILADO:
+            return self.compilado.predecir(X)
+        return np.asarray(self.booster.inplace_predict(X, validate_features=False), dtype=np.float64)
+
+    def clasificar(self, X):
+        probabilidades = self.predecir(X)
+        return (probabilidades > UMBRAL_CLASE).astype(int), probabilidades
+
+
+def motor_de(ruta):
+    # Un motor por modelo y por proceso; se reconstruye si cambia el .pkl.
+    # Si hay artefactos exportados para esta versión del modelo se usan en
+    # lugar del pickle (ver artefactos.py)
+    from artefactos import motor_artefacto, version_artefactos
+
+    version = version_artefactos()
+    if version is not None:
+        motor = registro.obtener_cargado(
+            ruta, "motor_artefacto", lambda: motor_artefacto(ruta), "artefactos", version_extra=version,
+        )
+        if motor is not None:
+            return motor
+    return registro.obtener_derivado(ruta, "motor", MotorInferencia)
+
+
+def verificar_paridad(filas=2000, semilla=0, tolerancia=1e-5):
+    """Compara el motor, los árboles compilados y los artefactos contra el envoltorio de scikit-learn."""
+    from artefactos import motor_artefacto
+    from codificacion import COLUMNAS_PRESTACIONES, COLUMNAS_SALARIO, codificar, perfil_aleatorio
+    from modelos import cargar_modelo, modelos_prestaciones, modelos_salario
+
+    def diferencia_artefacto(ruta, X, esperado):
+        # Árboles en memoria mapeada y booster .ubj; 0 si no hay artefactos vigentes
+        motor = motor_artefacto(ruta)
+        if motor is None:
+            return 0.0
+        return max(diferencia_compilado(motor.compilado, X, esperado), np.abs(motor.predecir(X) - esperado).max())
+
+    def diferencia_compilado(compilado, X, esperado):
+        # 0 si el modelo no se puede compilar y se evalúa sólo con el booster
+        return 0.0 if compilado is None else np.abs(compilado.predecir(X) - esperado).max()
+
+    perfil = perfil_aleatorio(filas, semilla)
+
+    correcto = True
+    for ruta in modelos_prestaciones.values():
+        modelo = cargar_modelo(ruta)
+        X = codificar(perfil, COLUMNAS_PRESTACIONES)
+        clases, probabilidades = MotorInferencia(modelo, compilar=False).clasificar(X)
+        esperado = modelo.predict_proba(X)[:, 1]
+        diferencia = max(
+            np.abs(probabilidades - esperado).max(),
+            diferencia_compilado(compilar_arboles(modelo.get_booster()), X, esperado),
+            diferencia_artefacto(ruta, X, esperado),
+        )
+        clases_iguales = np.array_equal(clases, modelo.predict(X))
+        correcto &= diferencia <= tolerancia and clases_iguales
+        print(f"{ruta}: diferencia máxima {diferencia:.2e}, clases iguales: {clases_iguales}")
+
+    for ruta in modelos_salario.values():
+        modelo = cargar_modelo(ruta)
+        X = codificar(perfil, COLUMNAS_SALARIO)
+        esperado = modelo.predict(X)
+        diferencia = max(
+            np.abs(MotorInferencia(modelo, compilar=False).predecir(X) - esperado).max(),
+            diferencia_compilado(compilar_arboles(modelo.get_booster()), X, esperado),
+            diferencia_artefacto(ruta, X, esperado),
+        )
+        correcto &= diferencia <= tolerancia
+        print(f"{ruta}: diferencia máxima {diferencia:.2e}")
+    return bool(correcto)
+
+
+if __name__ == "__main__":
+    if "--verificar" in sys.argv[1:]:
+        sys.exit(0 if verificar_paridad() else 1)
+    print(__doc__)
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import threading
+import time
+
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Cargar modelos entrenados previamente
+modelos_prestaciones = {
+    "Aguinaldo": "modelo_aguinaldo.pkl",
+    "Vacaciones con sueldo": "modelo_vacaciones.pkl",
+    "Servicio Médico": "modelo_servicio_medico.pkl",
+    "Utilidades": "modelo_utilidades.pkl",
+    "Incapacidad con sueldo": "modelo_incap_sueldo.pkl",
+    "AFORE": "modelo_afore.pkl",
+    "Crédito para vivienda": "modelo_credito_vivienda.pkl",
+}
+
+# Diccionario de modelos con nombres internos
+modelos_salario = {
+    "cualquier_discapacidad": "modelo_salario_cualquier_discapacidad.pkl",
+    "discapacidad_ver": "modelo_salario_discapacidad_ver.pkl",
+    "discapacidad_oir": "modelo_salario_discapacidad_oir.pkl",
+    "discapacidad_caminar": "modelo_salario_discapacidad_caminar.pkl",
+    "discapacidad_banarse": "modelo_salario_discapacidad_banarse.pkl",
+    "discapacidad_hablar": "modelo_salario_discapacidad_hablar.pkl",
+    "discapacidad_recordar": "modelo_salario_discapacidad_recordar.pkl",
+}
+
+# Diccionario para mostrar nombres formales
+nombres_formales = {
+    "cualquier_discapacidad": "Cualquier Discapacidad",
+    "discapacidad_ver": "Discapacidad Visual",
+    "discapacidad_oir": "Discapacidad Auditiva",
+    "discapacidad_caminar": "Discapacidad Motriz",
+    "discapacidad_banarse": "Discapacidad para Cuidarse",
+    "discapacidad_hablar": "Discapacidad del Habla",
+    "discapacidad_recordar": "Discapacidad Cognitiva",
+}
+
+
+def _memoria_residente():
+    # Memoria residente del proceso en bytes (0 si no se puede medir)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class RegistroModelos:
+    """Mantiene cada modelo cargado una sola vez por proceso.
+
+    Los modelos se comparten entre sesiones y reejecuciones de Streamlit; si
+    el archivo ``.pkl`` cambia en disco (fecha de modificación distinta) se
+    vuelve a cargar en la siguiente consulta.
+    """
+
+    def __init__(self, rutas, directorio=DIRECTORIO):
+        self.rutas = list(dict.fromkeys(rutas))
+        self.directorio = directorio
+        self._modelos = {}
+        self._derivados = {}
+        self._estadisticas = {}
+        self._huellas = {}
+        self._candado = threading.Lock()
+        self._candados_ruta = {}
+
+    def _ruta_absoluta(self, ruta):
+        return ruta if os.path.isabs(ruta) else os.path.join(self.directorio, ruta)
+
+    def _candado_de(self, ruta):
+        with self._candado:
+            return self._candados_ruta.setdefault(ruta, threading.RLock())
+
+    def version(self, ruta):
+        # Identifica la versión en disco del modelo; cambia al reemplazar el archivo
+        return os.stat(self._ruta_absoluta(ruta)).st_mtime_ns
+
+    def huella(self, ruta):
+        # SHA-256 del archivo; se recalcula sólo cuando cambia su fecha de modificación
+        version = self.version(ruta)
+        guardada = self._huellas.get(ruta)
+        if guardada is None or guardada[0] != version:
+            with open(self._ruta_absoluta(ruta), "rb") as f:
+                guardada = (version, hashlib.sha256(f.read()).hexdigest())
+            self._huellas[ruta] = guardada
+        return guardada[1]
+
+    def obtener(self, ruta):
+        version = self.version(ruta)
+        entrada = self._modelos.get(ruta)
+        if entrada is not None and entrada[0] == version:
+            return entrada[1]
+
+        # Un candado por archivo: dos sesiones que piden el mismo modelo
+        # esperan a una sola carga, pero modelos distintos cargan en paralelo
+        with self._candado_de(ruta):
+            entrada = self._modelos.get(ruta)
+            if entrada is not None and entrada[0] == version:
+                return entrada[1]
+
+            from joblib import load
+
+            modelo = self._medir_carga(ruta, "pickle", lambda: load(self._ruta_absoluta(ruta)))
+            with self._candado:
+                self._modelos[ruta] = (version, modelo)
+            return modelo
+
+    def _medir_carga(self, ruta, origen, cargar):
+        # Ejecuta la carga y registra su tiempo y memoria; no registra nada si devuelve None.
+        # El tamaño es el de los archivos que se cargaron: los del objeto si los
+        # declara en ``bytes_archivos`` (p. ej. los artefactos), si no el del .pkl
+        memoria_antes = _memoria_residente()
+        inicio = time.perf_counter()
+        objeto = cargar()
+        segundos = time.perf_counter() - inicio
+        memoria = max(_memoria_residente() - memoria_antes, 0)
+        if objeto is None:
+            return None
+        tamano = getattr(objeto, "bytes_archivos", None)
+        if tamano is None:
+            tamano = os.path.getsize(self._ruta_absoluta(ruta))
+
+        with self._candado:
+            previas = self._estadisticas.get(ruta, {}).get("cargas", 0)
+            self._estadisticas[ruta] = {
+                "modelo": ruta,
+                "origen": origen,
+                "segundos_carga": segundos,
+                "memoria_mb": memoria / 2**20,
+                "tamano_archivo_mb": tamano / 2**20,
+                "cargas": previas + 1,
+            }
+        return objeto
+
+    def obtener_derivado(self, ruta, tipo, construir):
+        """Objeto construido a partir del modelo (motor, explicador, ...).
+
+        Se construye una sola vez por versión del modelo y se descarta
+        automáticamente cuando el archivo ``.pkl`` cambia.
+        """
+        version = self.version(ruta)
+        entrada = self._derivados.get((ruta, tipo))
+        if entrada is not None and entrada[0] == version:
+            return entrada[1]
+
+        with self._candado_de(ruta):
+            entrada = self._derivados.get((ruta, tipo))
+            if entrada is not None and entrada[0] == version:
+                return entrada[1]
+            derivado = construir(self.obtener(ruta))
+            self._derivados[(ruta, tipo)] = (version, derivado)
+            return derivado
+
+    def obtener_cargado(self, ruta, tipo, cargar, origen, version_extra=None):
+        """Objeto que se carga sin pasar por el ``.pkl`` (p. ej. el motor desde artefactos).
+
+        Se guarda como un derivado más, válido mientras no cambien el modelo
+        ni ``version_extra``, y su carga cuenta en las estadísticas del
+        modelo. ``cargar`` puede devolver None si no hay de dónde cargar; el
+        None también se guarda para no reintentar en cada consulta.
+        """
+        version = (self.version(ruta), version_extra)
+        entrada = self._derivados.get((ruta, tipo))
+        if entrada is not None and entrada[0] == version:
+            return entrada[1]
+
+        with self._candado_de(ruta):
+            entrada = self._derivados.get((ruta, tipo))
+            if entrada is not None and entrada[0] == version:
+                return entrada[1]
+            objeto = self._medir_carga(ruta, origen, cargar)
+            self._derivados[(ruta, tipo)] = (version, objeto)
+            return objeto
+
+    def precargar(self):
+        # Se precarga el motor que usa la app, que puede no necesitar el .pkl
+        from inferencia import motor_de
+
+        for ruta in self.rutas:
+            motor_de(ruta)
+
+    def estadisticas(self):
+        with self._candado:
+            return [dict(self._estadisticas[ruta]) for ruta in self.rutas if ruta in self._estadisticas]
+
+
+registro = RegistroModelos(list(modelos_prestaciones.values()) + list(modelos_salario.values()))
+
+
+def cargar_modelo(nombre_modelo):
+    return registro.obtener(nombre_modelo)
+
+
+if os.environ.get("PRECARGAR_MODELOS", "").lower() in ("1", "true", "si", "sí"):
+    registro.precargar()
+
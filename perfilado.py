@@ -0,0 +1,163 @@
+"""Perfil de arranque de la app: costo de importaciones y de render por sección.
+
+Cada sección importa sus dependencias pesadas dentro de
+``perfil_arranque.importando(seccion)``. La primera vez que una sección se
+ejecuta en el proceso se mide cuánto tardaron esas importaciones, qué paquetes
+se cargaron y cuánto tardó cada uno (tiempo acumulado, como la columna
+"cumulative" de ``python -X importtime``). El resumen se muestra en la barra
+lateral cuando la variable de entorno ``PERFILAR_ARRANQUE`` vale 1.
+
+Además, cada ejecución del script puede medir sus etapas (cargar el modelo,
+codificar, predecir, graficar...) con ``TiemposRerun``; el panel de
+depuración con esos tiempos se muestra cuando ``DEPURAR_TIEMPOS`` vale 1.
+"""
+import contextlib
+import os
+import sys
+import threading
+import time
+
+
+def _bandera(variable):
+    return os.environ.get(variable, "").lower() in ("1", "true", "si", "sí")
+
+
+ACTIVO = _bandera("PERFILAR_ARRANQUE")
+ACTIVO_TIEMPOS = _bandera("DEPURAR_TIEMPOS")
+
+
+class _CargadorMedido:
+    """Envuelve el cargador de un solo módulo para medir su ejecución.
+
+    El cargador original no se modifica (puede ser compartido, como el de
+    ``zipimport``); el módulo queda con su cargador original al ejecutarse.
+    """
+
+    def __init__(self, cargador, nombre, tiempos):
+        self._cargador = cargador
+        self._nombre = nombre
+        self._tiempos = tiempos
+
+    def create_module(self, spec):
+        return self._cargador.create_module(spec)
+
+    def exec_module(self, modulo):
+        modulo.__spec__.loader = self._cargador
+        modulo.__loader__ = self._cargador
+        inicio = time.perf_counter()
+        try:
+            self._cargador.exec_module(modulo)
+        finally:
+            self._tiempos[self._nombre] = time.perf_counter() - inicio
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargador, atributo)
+
+
+class _CronometroImportaciones:
+    """Buscador de módulos que mide el tiempo de importación de cada paquete de primer nivel.
+
+    Sólo cuenta las importaciones del hilo que lo creó: ``sys.meta_path`` es
+    global y otras sesiones pueden estar importando al mismo tiempo.
+    """
+
+    def __init__(self):
+        self.hilo = threading.get_ident()
+        self.tiempos = {}
+        self.importados = set()
+
+    def find_spec(self, nombre, ruta, objetivo=None):
+        if threading.get_ident() != self.hilo:
+            return None
+        self.importados.add(nombre)
+        if "." in nombre:
+            return None
+        for buscador in sys.meta_path:
+            if buscador is self or not hasattr(buscador, "find_spec"):
+                continue
+            spec = buscador.find_spec(nombre, ruta, objetivo)
+            if spec is not None:
+                break
+        else:
+            return None
+        # Los módulos integrados y congelados no se miden
+        if spec.loader is None or isinstance(spec.loader, type) or not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = _CargadorMedido(spec.loader, nombre, self.tiempos)
+        return spec
+
+
+class PerfilArranque:
+    def __init__(self):
+        self._secciones = {}
+        self._candado = threading.Lock()
+
+    @contextlib.contextmanager
+    def importando(self, seccion):
+        # Sólo la primera ejecución de la sección refleja el costo en frío
+        with self._candado:
+            medir = seccion not in self._secciones
+            if medir:
+                self._secciones[seccion] = {"seccion": seccion}
+        if not medir:
+            yield
+            return
+
+        cronometro = _CronometroImportaciones()
+        sys.meta_path.insert(0, cronometro)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            sys.meta_path.remove(cronometro)
+            nuevos = {m.split(".")[0] for m in cronometro.importados if m in sys.modules}
+            paquetes = sorted(cronometro.tiempos.items(), key=lambda p: p[1], reverse=True)
+            with self._candado:
+                self._secciones[seccion].update({
+                    "importaciones_s": segundos,
+                    "modulos_nuevos": len(nuevos),
+                    "paquetes_mas_lentos": ", ".join(f"{n} ({s:.2f} s)" for n, s in paquetes[:5]),
+                })
+
+    def registrar_render(self, seccion, inicio):
+        segundos = time.perf_counter() - inicio
+        with self._candado:
+            datos = self._secciones.setdefault(seccion, {"seccion": seccion})
+            datos.setdefault("primer_render_s", segundos)
+            datos["ultimo_render_s"] = segundos
+
+    def reporte(self):
+        with self._candado:
+            return [dict(datos) for datos in self._secciones.values()]
+
+
+class TiemposRerun:
+    """Duración de cada etapa de una ejecución del script de la app.
+
+    Se crea una instancia al inicio de cada rerun; si está inactiva,
+    ``etapa`` no mide nada.
+    """
+
+    def __init__(self, activo=ACTIVO_TIEMPOS):
+        self.activo = activo
+        self.inicio = time.perf_counter()
+        self.etapas = []
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        if not self.activo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas.append({"etapa": nombre, "ms": (time.perf_counter() - inicio) * 1000})
+
+    def reporte(self):
+        total = {"etapa": "Total del rerun", "ms": (time.perf_counter() - self.inicio) * 1000}
+        return self.etapas + [total]
+
+
+perfil_arranque = PerfilArranque()
@@ -0,0 +1,135 @@
+"""Predicción por lotes de las prestaciones laborales.
+
+Lee un archivo CSV o Parquet por bloques, codifica las variables una sola vez
+por bloque y calcula la probabilidad de las siete prestaciones, escribiendo el
+resultado conforme avanza para que la memoria no dependa del tamaño del archivo.
+
+Uso:
+    python prediccion_lote.py personas.csv probabilidades.parquet --tamano-bloque 50000
+"""
+import argparse
+import os
+
+import pandas as pd
+
+from codificacion import COLUMNAS_PRESTACIONES, VARIABLES_PRESTACIONES, codificar, validar_columnas
+from inferencia import motor_de
+from modelos import modelos_prestaciones
+
+
+TAMANO_BLOQUE = 50_000
+
+COLUMNAS_ENTRADA = VARIABLES_PRESTACIONES
+
+
+def columna_probabilidad(prestacion):
+    # "modelo_servicio_medico.pkl" -> "prob_servicio_medico"
+    return "prob_" + modelos_prestaciones[prestacion][len("modelo_"):-len(".pkl")]
+
+
+def codificar_lote(bloque):
+    faltantes = [c for c in COLUMNAS_ENTRADA if c not in bloque.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo de entrada: {', '.join(faltantes)}")
+    return codificar(bloque, COLUMNAS_PRESTACIONES)
+
+
+def predecir_bloque(bloque, motores, explicar=False):
+    entradas = codificar_lote(bloque)
+    resultado = bloque.reset_index(drop=True)
+    for prestacion, motor in motores.items():
+        resultado[columna_probabilidad(prestacion)] = motor.predecir(entradas)
+    if explicar:
+        from explicaciones import valores_shap
+
+        # Contribuciones SHAP de todo el bloque en una sola llamada por modelo
+        columnas = {}
+        for prestacion in motores:
+            prefijo = columna_probabilidad(prestacion).replace("prob_", "shap_", 1)
+            valores = valores_shap(modelos_prestaciones[prestacion], entradas)
+            for j, columna in enumerate(COLUMNAS_PRESTACIONES):
+                columnas[f"{prefijo}__{columna}"] = valores[:, j]
+        resultado = pd.concat([resultado, pd.DataFrame(columnas)], axis=1)
+    return resultado
+
+
+def leer_por_bloques(ruta, tamano_bloque=TAMANO_BLOQUE):
+    if ruta.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        for lote in archivo.iter_batches(batch_size=tamano_bloque):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(ruta, chunksize=tamano_bloque)
+
+
+class EscritorIncremental:
+    """Escribe los bloques de resultados en CSV o Parquet según la extensión."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.parquet = ruta.lower().endswith(".parquet")
+        self._escritor = None
+        self._primero = True
+
+    def escribir(self, bloque):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if self._escritor is None:
+                self._escritor = pq.ParquetWriter(self.ruta, tabla.schema)
+            self._escritor.write_table(tabla)
+        else:
+            bloque.to_csv(self.ruta, mode="w" if self._primero else "a", header=self._primero, index=False)
+        self._primero = False
+
+    def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def predecir_archivo(ruta_entrada, ruta_salida, tamano_bloque=TAMANO_BLOQUE, al_avanzar=None, explicar=False):
+    for ruta in modelos_prestaciones.values():
+        validar_columnas(motor_de(ruta), COLUMNAS_PRESTACIONES)
+    motores = {nombre: motor_de(ruta) for nombre, ruta in modelos_prestaciones.items()}
+    filas = 0
+    with EscritorIncremental(ruta_salida) as escritor:
+        for bloque in leer_por_bloques(ruta_entrada, tamano_bloque):
+            escritor.escribir(predecir_bloque(bloque, motores, explicar))
+            filas += len(bloque)
+            if al_avanzar is not None:
+                al_avanzar(filas)
+    return filas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Predicción por lotes de las prestaciones laborales.")
+    parser.add_argument("entrada", help="Archivo CSV o Parquet con las columnas: " + ", ".join(COLUMNAS_ENTRADA))
+    parser.add_argument("salida", help="Archivo CSV o Parquet de salida con las probabilidades")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE, help="Filas procesadas por bloque")
+    parser.add_argument("--explicar", action="store_true", help="Agrega las contribuciones SHAP de cada variable")
+    args = parser.parse_args(argumentos)
+
+    if os.path.abspath(args.entrada) == os.path.abspath(args.salida):
+        parser.error("El archivo de salida debe ser distinto al de entrada.")
+
+    filas = predecir_archivo(
+        args.entrada, args.salida, args.tamano_bloque,
+        al_avanzar=lambda n: print(f"{n} filas procesadas", flush=True),
+        explicar=args.explicar,
+    )
+    print(f"Listo: {filas} filas escritas en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
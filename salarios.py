@@ -0,0 +1,31 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from cache_predicciones import cache_predicciones
+from codificacion import COLUMNAS_SALARIO, codificar
+from modelos import modelos_salario, nombres_formales
+from tabla_consulta import log_salario
+
+
+def brechas_salariales(perfil):
+    """Salario por hora con y sin discapacidad para los siete modelos de salario.
+
+    Cada modelo se evalúa una sola vez sobre una matriz de dos filas (con y sin
+    su discapacidad) en lugar de dos llamadas separadas; las predicciones
+    pasan por la caché compartida.
+    """
+    filas = []
+    for discapacidad in modelos_salario:
+        X = codificar({**perfil, discapacidad: np.array([1, 0])}, COLUMNAS_SALARIO)
+        predicciones = cache_predicciones.predecir(modelos_salario[discapacidad], X, partial(log_salario, discapacidad))
+        salario_con, salario_sin = np.exp(predicciones)
+        filas.append({
+            "Discapacidad": nombres_formales[discapacidad],
+            "Salario con discapacidad": salario_con,
+            "Salario sin discapacidad": salario_sin,
+            "Brecha (MXN)": salario_sin - salario_con,
+            "Brecha (%)": 100 * (salario_sin - salario_con) / salario_sin,
+        })
+    return pd.DataFrame(filas)
@@ -0,0 +1,322 @@
+"""Servicio HTTP de inferencia con los mismos modelos y codificación que la app.
+
+Es una aplicación ASGI sin dependencias adicionales; se levanta con:
+    uvicorn servicio:app --host 0.0.0.0 --port 8000
+
+Rutas:
+    GET  /salud          Estado del servicio y modelos disponibles.
+    POST /prestaciones   Probabilidad de las prestaciones.
+    POST /salarios       Salario por hora con y sin cada discapacidad.
+
+El cuerpo de los POST es un perfil o una lista de perfiles con las mismas
+variables y opciones que la app (``edad``, ``mujer``, ``escoacum``,
+``afrodes_new``, ``hlengua_new``, ``region``, ``sector``, ``localidad`` y, en
+prestaciones, ``cualquier_discapacidad``):
+
+    {"perfiles": [{"edad": 30, "mujer": "Mujer", ...}], "prestaciones": ["Aguinaldo"]}
+
+Las solicitudes que llegan casi al mismo tiempo se agrupan en un solo lote
+por modelo (micro-lotes) y se evalúan en un grupo de hilos, sin bloquear el
+ciclo de eventos.
+"""
+import asyncio
+import contextlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from codificacion import (
+    COLUMNAS_PRESTACIONES, COLUMNAS_SALARIO, VARIABLES_ENTRADA, VARIABLES_PRESTACIONES,
+    codificar, validar_columnas,
+)
+from inferencia import UMBRAL_CLASE, motor_de
+from modelos import modelos_prestaciones, modelos_salario, nombres_formales, registro
+from tabla_consulta import log_salario, probabilidad_prestacion
+
+
+HILOS = int(os.environ.get("SERVICIO_HILOS", os.cpu_count() or 1))
+ESPERA_LOTE = float(os.environ.get("SERVICIO_ESPERA_LOTE_MS", "5")) / 1000
+MAX_FILAS_LOTE = int(os.environ.get("SERVICIO_MAX_FILAS_LOTE", "4096"))
+MAX_CUERPO = 16 * 2**20
+
+
+class ErrorSolicitud(Exception):
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+@contextlib.contextmanager
+def _entrada_invalida():
+    # Cualquier error al interpretar el cuerpo es un error del cliente, no del servicio
+    try:
+        yield
+    except (ValueError, TypeError) as error:
+        raise ErrorSolicitud(str(error)) from None
+
+
+def _evaluar_prestaciones(entradas):
+    X, = entradas
+    return np.column_stack([probabilidad_prestacion(p, X) for p in modelos_prestaciones])
+
+
+def _evaluar_salarios(entradas):
+    # Para cada discapacidad: logaritmo del salario con y sin ella
+    sin, *con = entradas
+    columnas = []
+    for discapacidad, X_con in zip(modelos_salario, con):
+        predicciones = log_salario(discapacidad, np.vstack([X_con, sin]))
+        columnas += [predicciones[:len(sin)], predicciones[len(sin):]]
+    return np.exp(np.column_stack(columnas))
+
+
+class MicroLotes:
+    """Agrupa solicitudes concurrentes y las evalúa juntas en un grupo de hilos.
+
+    Cada solicitud aporta una lista de matrices con el mismo número de filas;
+    las matrices de las solicitudes de un lote se apilan, se evalúan con una
+    sola llamada y el resultado se reparte por filas.
+    """
+
+    def __init__(self, evaluar, ejecutor, espera=ESPERA_LOTE, max_filas=MAX_FILAS_LOTE, en_vuelo=HILOS):
+        self.evaluar_lote = evaluar
+        self.ejecutor = ejecutor
+        self.espera = espera
+        self.max_filas = max_filas
+        self.en_vuelo = en_vuelo
+        self._cola = None
+        self._semaforo = None
+        self._tarea = None
+
+    def iniciar(self):
+        self._cola = asyncio.Queue()
+        self._semaforo = asyncio.Semaphore(self.en_vuelo)
+        self._tarea = asyncio.create_task(self._agrupar())
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            await asyncio.gather(self._tarea, return_exceptions=True)
+            self._tarea = None
+
+    async def evaluar(self, entradas):
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((entradas, futuro))
+        return await futuro
+
+    async def _agrupar(self):
+        ciclo = asyncio.get_running_loop()
+        while True:
+            lote = [await self._cola.get()]
+            filas = len(lote[0][0][0])
+            limite = ciclo.time() + self.espera
+            while filas < self.max_filas:
+                restante = limite - ciclo.time()
+                if restante <= 0:
+                    break
+                try:
+                    solicitud = await asyncio.wait_for(self._cola.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+                lote.append(solicitud)
+                filas += len(solicitud[0][0])
+            # Se limita el número de lotes en evaluación a la vez
+            await self._semaforo.acquire()
+            ciclo.create_task(self._despachar(lote))
+
+    async def _despachar(self, lote):
+        try:
+            entradas = [np.vstack(matrices) for matrices in zip(*(e for e, _ in lote))]
+            resultado = await asyncio.get_running_loop().run_in_executor(self.ejecutor, self.evaluar_lote, entradas)
+        except Exception as error:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(error)
+            return
+        finally:
+            self._semaforo.release()
+
+        inicio = 0
+        for entradas, futuro in lote:
+            filas = len(entradas[0])
+            if not futuro.done():
+                futuro.set_result(resultado[inicio:inicio + filas])
+            inicio += filas
+
+
+def _perfiles(cuerpo, variables):
+    if isinstance(cuerpo, dict) and "perfiles" in cuerpo:
+        perfiles = cuerpo["perfiles"]
+    else:
+        perfiles = cuerpo
+    if isinstance(perfiles, dict):
+        perfiles = [perfiles]
+    if not isinstance(perfiles, list) or not perfiles or not all(isinstance(p, dict) for p in perfiles):
+        raise ErrorSolicitud("Se esperaba un perfil o una lista no vacía de perfiles")
+
+    # De lista de perfiles a un arreglo por variable, como lo recibe el codificador
+    datos = {}
+    for variable in variables:
+        faltan = [i for i, p in enumerate(perfiles) if variable not in p]
+        if faltan:
+            raise ErrorSolicitud(f"Falta la variable '{variable}' en los perfiles {faltan[:10]}")
+        compuestos = [i for i, p in enumerate(perfiles) if isinstance(p[variable], (list, dict))]
+        if compuestos:
+            raise ErrorSolicitud(f"La variable '{variable}' debe ser un valor simple en los perfiles {compuestos[:10]}")
+        datos[variable] = np.asarray([p[variable] for p in perfiles])
+    return datos
+
+
+def _seleccion(cuerpo, campo, disponibles):
+    pedidos = cuerpo.get(campo) if isinstance(cuerpo, dict) else None
+    if pedidos is None:
+        return list(disponibles)
+    if not isinstance(pedidos, list) or not all(isinstance(p, str) for p in pedidos):
+        raise ErrorSolicitud(f"'{campo}' debe ser una lista de nombres")
+    desconocidos = [p for p in pedidos if p not in disponibles]
+    if desconocidos:
+        raise ErrorSolicitud(f"Valores no válidos en '{campo}': {', '.join(map(str, desconocidos))}")
+    return list(pedidos)
+
+
+class Servicio:
+    def __init__(self, hilos=HILOS):
+        self.ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="inferencia")
+        self.prestaciones = MicroLotes(_evaluar_prestaciones, self.ejecutor, en_vuelo=hilos)
+        self.salarios = MicroLotes(_evaluar_salarios, self.ejecutor, en_vuelo=hilos)
+
+    async def iniciar(self):
+        # Carga y valida todos los modelos antes de aceptar solicitudes
+        def preparar():
+            for ruta in modelos_prestaciones.values():
+                validar_columnas(motor_de(ruta), COLUMNAS_PRESTACIONES)
+            for ruta in modelos_salario.values():
+                validar_columnas(motor_de(ruta), COLUMNAS_SALARIO)
+
+        await asyncio.get_running_loop().run_in_executor(self.ejecutor, preparar)
+        self.prestaciones.iniciar()
+        self.salarios.iniciar()
+
+    async def detener(self):
+        await self.prestaciones.detener()
+        await self.salarios.detener()
+        self.ejecutor.shutdown(wait=False)
+
+    async def salud(self, cuerpo):
+        return {
+            "estado": "ok",
+            "prestaciones": list(modelos_prestaciones),
+            "salarios": list(modelos_salario),
+            "modelos_cargados": len(registro.estadisticas()),
+        }
+
+    async def predecir_prestaciones(self, cuerpo):
+        with _entrada_invalida():
+            perfil = _perfiles(cuerpo, VARIABLES_PRESTACIONES)
+            pedidas = _seleccion(cuerpo, "prestaciones", modelos_prestaciones)
+            X = codificar(perfil, COLUMNAS_PRESTACIONES)
+
+        probabilidades = await self.prestaciones.evaluar([X])
+        indice = {p: j for j, p in enumerate(modelos_prestaciones)}
+        return {"resultados": [
+            {
+                p: {"probabilidad": float(fila[indice[p]]), "prediccion": int(fila[indice[p]] > UMBRAL_CLASE)}
+                for p in pedidas
+            }
+            for fila in probabilidades
+        ]}
+
+    async def predecir_salarios(self, cuerpo):
+        with _entrada_invalida():
+            perfil = _perfiles(cuerpo, VARIABLES_ENTRADA)
+            pedidas = _seleccion(cuerpo, "discapacidades", modelos_salario)
+            sin = codificar(perfil, COLUMNAS_SALARIO)
+        con = []
+        for discapacidad in modelos_salario:
+            X = sin.copy()
+            X[:, COLUMNAS_SALARIO.index(discapacidad)] = 1
+            con.append(X)
+
+        salarios = await self.salarios.evaluar([sin, *con])
+        indice = {d: 2 * j for j, d in enumerate(modelos_salario)}
+        return {"resultados": [
+            {
+                d: {
+                    "nombre": nombres_formales[d],
+                    "salario_con": float(fila[indice[d]]),
+                    "salario_sin": float(fila[indice[d] + 1]),
+                    "brecha": float(fila[indice[d] + 1] - fila[indice[d]]),
+                }
+                for d in pedidas
+            }
+            for fila in salarios
+        ]}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._ciclo_de_vida(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        rutas = {
+            ("GET", "/salud"): self.salud,
+            ("POST", "/prestaciones"): self.predecir_prestaciones,
+            ("POST", "/salarios"): self.predecir_salarios,
+        }
+        manejador = rutas.get((scope["method"], scope["path"].rstrip("/") or "/"))
+        try:
+            if manejador is None:
+                raise ErrorSolicitud("Ruta no encontrada", 404)
+            cuerpo = await self._leer_cuerpo(receive) if scope["method"] == "POST" else None
+            respuesta, estado = await manejador(cuerpo), 200
+        except ErrorSolicitud as error:
+            respuesta, estado = {"error": str(error)}, error.estado
+        await self._responder(send, estado, respuesta)
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "lifespan.startup":
+                try:
+                    await self.iniciar()
+                except Exception as error:
+                    await send({"type": "lifespan.startup.failed", "message": str(error)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif mensaje["type"] == "lifespan.shutdown":
+                await self.detener()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _leer_cuerpo(receive):
+        partes, tamano = [], 0
+        while True:
+            mensaje = await receive()
+            parte = mensaje.get("body", b"")
+            tamano += len(parte)
+            if tamano > MAX_CUERPO:
+                raise ErrorSolicitud("El cuerpo de la solicitud es demasiado grande", 413)
+            partes.append(parte)
+            if not mensaje.get("more_body", False):
+                break
+        try:
+            return json.loads(b"".join(partes) or b"null")
+        except ValueError:
+            raise ErrorSolicitud("El cuerpo no es JSON válido") from None
+
+    @staticmethod
+    async def _responder(send, estado, contenido):
+        cuerpo = json.dumps(contenido, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": estado,
+            "headers": [(b"content-type", b"application/json; charset=utf-8")],
+        })
+        await send({"type": "http.response.body", "body": cuerpo})
+
+
+app = Servicio()
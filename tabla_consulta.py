@@ -0,0 +1,288 @@
+"""Tabla precalculada con las predicciones de todo el espacio de entradas.
+
+Salvo la edad (18 a 99) y la escolaridad (0 a 30), todas las variables son
+binarias o categóricas pequeñas, así que el espacio de perfiles es finito:
+82 × 31 × 2 × 2 × 2 × 2 × 5 × 3 × 5 = 3,050,400 combinaciones. Este módulo
+evalúa una vez los 14 modelos sobre esa malla y guarda el resultado en
+arreglos ``.npy`` que la app abre como memoria mapeada; una predicción se
+vuelve una consulta O(1) por índice.
+
+Cada tabla se acompaña de un manifiesto con la huella SHA-256 de los modelos;
+si algún ``.pkl`` cambia, la tabla se considera vencida y la app vuelve a usar
+el modelo directamente.
+
+Para construir la tabla y para compararla contra los modelos:
+    python tabla_consulta.py
+    python tabla_consulta.py --verificar
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from codificacion import (
+    COLUMNAS_PRESTACIONES, COLUMNAS_SALARIO, DISCAPACIDADES, LOCALIDADES, RANGOS, REGIONES, SECTORES,
+    codificar, perfil_aleatorio,
+)
+from inferencia import motor_de
+from modelos import DIRECTORIO, modelos_prestaciones, modelos_salario, registro
+
+
+DIRECTORIO_TABLA = os.path.join(DIRECTORIO, "tabla_consulta")
+VERSION_FORMATO = 1
+
+EDAD_MIN, EDAD_MAX = RANGOS["edad"]
+ESCOLARIDAD_MIN, ESCOLARIDAD_MAX = RANGOS["escoacum"]
+
+# Dimensiones de la malla, de la más lenta a la más rápida; "discapacidad"
+# es cualquier_discapacidad en las prestaciones y, en los salarios, la
+# discapacidad propia de cada modelo (el escenario "con discapacidad")
+DIMENSIONES = [
+    ("edad", EDAD_MAX - EDAD_MIN + 1),
+    ("escoacum", ESCOLARIDAD_MAX - ESCOLARIDAD_MIN + 1),
+    ("mujer", 2),
+    ("afrodes_new", 2),
+    ("hlengua_new", 2),
+    ("discapacidad", 2),
+    ("region", len(REGIONES)),
+    ("sector", len(SECTORES)),
+    ("localidad", len(LOCALIDADES)),
+]
+TAMANOS = [tamano for _, tamano in DIMENSIONES]
+TOTAL = int(np.prod(TAMANOS))
+
+_CATEGORICAS = {"region": REGIONES, "sector": SECTORES, "localidad": LOCALIDADES}
+
+@functools.lru_cache(maxsize=None)
+def _pesos(columnas, discapacidad):
+    # El índice plano es lineal en las columnas codificadas: indice = X @ pesos + constante
+    pasos = np.cumprod([1] + TAMANOS[:0:-1])[::-1]
+    paso = dict(zip([nombre for nombre, _ in DIMENSIONES], pasos))
+    pesos = np.zeros(len(columnas))
+    constante = -EDAD_MIN * paso["edad"] - ESCOLARIDAD_MIN * paso["escoacum"]
+    for variable in ("edad", "escoacum", "mujer", "afrodes_new", "hlengua_new"):
+        pesos[columnas.index(variable)] = paso[variable]
+    pesos[columnas.index(discapacidad)] = paso["discapacidad"]
+
+    grupos = []
+    for variable, opciones in _CATEGORICAS.items():
+        # Cada opción i suma (i - base) pasos sobre la categoría base
+        nombres = list(opciones)
+        base = next(i for i, n in enumerate(nombres) if opciones[n] is None)
+        constante += base * paso[variable]
+        grupo = []
+        for i, nombre in enumerate(nombres):
+            if opciones[nombre] is not None:
+                pesos[columnas.index(opciones[nombre])] = (i - base) * paso[variable]
+                grupo.append(columnas.index(opciones[nombre]))
+        grupos.append(grupo)
+
+    continuas = [columnas.index("edad"), columnas.index("escoacum")]
+    binarias = [j for j in range(len(columnas)) if j not in continuas]
+    # Las otras discapacidades (incluida cualquier_discapacidad en los modelos
+    # de salario) no forman parte de la malla
+    otras = [columnas.index(c) for c in DISCAPACIDADES if c in columnas and c != discapacidad]
+    return pesos, constante, continuas, binarias, grupos, otras
+
+
+def indices(X, columnas, discapacidad="cualquier_discapacidad"):
+    """Índice plano de cada fila codificada; -1 si la fila está fuera de la malla."""
+    X = np.asarray(X, dtype=np.float64)
+    pesos, constante, continuas, binarias, grupos, otras = _pesos(tuple(columnas), discapacidad)
+
+    edad, escolaridad = X[:, continuas[0]], X[:, continuas[1]]
+    indicadoras = X[:, binarias]
+    valida = (
+        (edad >= EDAD_MIN) & (edad <= EDAD_MAX) & (edad == np.round(edad))
+        & (escolaridad >= ESCOLARIDAD_MIN) & (escolaridad <= ESCOLARIDAD_MAX) & (escolaridad == np.round(escolaridad))
+        & ((indicadoras == 0) | (indicadoras == 1)).all(axis=1)
+    )
+    for grupo in grupos:
+        valida &= X[:, grupo].sum(axis=1) <= 1
+    if otras:
+        valida &= ~X[:, otras].any(axis=1)
+    return np.where(valida, (X @ pesos + constante).astype(np.int64), -1)
+
+
+def _malla_resto():
+    # Todas las combinaciones de las dimensiones distintas de la edad
+    codigos = np.unravel_index(np.arange(TOTAL // TAMANOS[0]), TAMANOS[1:])
+    resto = dict(zip([nombre for nombre, _ in DIMENSIONES[1:]], codigos))
+    resto["escoacum"] = resto["escoacum"] + ESCOLARIDAD_MIN
+    for variable, opciones in _CATEGORICAS.items():
+        resto[variable] = np.asarray(list(opciones))[resto[variable]]
+    return resto
+
+
+def construir(directorio=DIRECTORIO_TABLA, al_avanzar=None):
+    os.makedirs(directorio, exist_ok=True)
+    resto = _malla_resto()
+    filas_por_edad = TOTAL // TAMANOS[0]
+
+    tablas = {
+        "prestaciones": (modelos_prestaciones, COLUMNAS_PRESTACIONES),
+        "salarios": (modelos_salario, COLUMNAS_SALARIO),
+    }
+    for nombre, (modelos, columnas) in tablas.items():
+        ruta_temporal = os.path.join(directorio, f"{nombre}.tmp.npy")
+        tabla = np.lib.format.open_memmap(
+            ruta_temporal, mode="w+", dtype=np.float32, shape=(TOTAL, len(modelos)),
+        )
+        for i, edad in enumerate(range(EDAD_MIN, EDAD_MAX + 1)):
+            perfil = {**resto, "edad": np.full(filas_por_edad, edad)}
+            inicio = i * filas_por_edad
+            for j, (clave, ruta) in enumerate(modelos.items()):
+                discapacidad = "cualquier_discapacidad" if nombre == "prestaciones" else clave
+                X = codificar({**perfil, discapacidad: perfil["discapacidad"]}, columnas)
+                tabla[inicio:inicio + filas_por_edad, j] = motor_de(ruta).predecir(X)
+            if al_avanzar is not None:
+                al_avanzar(nombre, edad)
+        tabla.flush()
+        del tabla
+        os.replace(ruta_temporal, os.path.join(directorio, f"{nombre}.npy"))
+
+    manifiesto = {
+        "version_formato": VERSION_FORMATO,
+        "dimensiones": DIMENSIONES,
+        "prestaciones": list(modelos_prestaciones),
+        "salarios": list(modelos_salario),
+        "huellas": {ruta: registro.huella(ruta) for ruta in registro.rutas},
+        "creado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(directorio, "manifiesto.json"), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+
+
+class TablaConsulta:
+    """Tablas precalculadas abiertas como memoria mapeada."""
+
+    def __init__(self, directorio=DIRECTORIO_TABLA):
+        with open(os.path.join(directorio, "manifiesto.json"), encoding="utf-8") as f:
+            self.manifiesto = json.load(f)
+        self.prestaciones = np.load(os.path.join(directorio, "prestaciones.npy"), mmap_mode="r")
+        self.salarios = np.load(os.path.join(directorio, "salarios.npy"), mmap_mode="r")
+        self._columna_prestacion = {n: j for j, n in enumerate(self.manifiesto["prestaciones"])}
+        self._columna_salario = {n: j for j, n in enumerate(self.manifiesto["salarios"])}
+
+    def vigente(self):
+        if self.manifiesto.get("version_formato") != VERSION_FORMATO:
+            return False
+        if [list(d) for d in self.manifiesto["dimensiones"]] != [list(d) for d in DIMENSIONES]:
+            return False
+        huellas = self.manifiesto["huellas"]
+        try:
+            return all(huellas.get(ruta) == registro.huella(ruta) for ruta in registro.rutas)
+        except OSError:
+            return False
+
+    def probabilidad(self, prestacion, X):
+        """Probabilidades de una prestación para filas codificadas; None si alguna no está en la tabla."""
+        indice = indices(X, COLUMNAS_PRESTACIONES)
+        if prestacion not in self._columna_prestacion or (indice < 0).any():
+            return None
+        return self.prestaciones[indice, self._columna_prestacion[prestacion]].astype(np.float64)
+
+    def log_salario(self, discapacidad, X):
+        """Logaritmo del salario para filas codificadas; None si alguna no está en la tabla."""
+        indice = indices(X, COLUMNAS_SALARIO, discapacidad)
+        if discapacidad not in self._columna_salario or (indice < 0).any():
+            return None
+        return self.salarios[indice, self._columna_salario[discapacidad]].astype(np.float64)
+
+
+_tabla = None
+_versiones_tabla = None
+_candado = threading.Lock()
+
+
+def tabla_vigente(directorio=DIRECTORIO_TABLA):
+    """La tabla si existe y corresponde a los modelos actuales; None en otro caso."""
+    global _tabla, _versiones_tabla
+    try:
+        versiones = (
+            os.stat(os.path.join(directorio, "manifiesto.json")).st_mtime_ns,
+            tuple(registro.version(ruta) for ruta in registro.rutas),
+        )
+    except OSError:
+        return None
+
+    with _candado:
+        if versiones != _versiones_tabla:
+            try:
+                tabla = TablaConsulta(directorio)
+                _tabla = tabla if tabla.vigente() else None
+            except (OSError, ValueError, KeyError):
+                _tabla = None
+            _versiones_tabla = versiones
+        return _tabla
+
+
+def probabilidad_prestacion(prestacion, X):
+    # Consulta la tabla y, si no está disponible, evalúa el modelo
+    tabla = tabla_vigente()
+    probabilidades = tabla.probabilidad(prestacion, X) if tabla is not None else None
+    if probabilidades is None:
+        probabilidades = motor_de(modelos_prestaciones[prestacion]).predecir(X)
+    return probabilidades
+
+
+def log_salario(discapacidad, X):
+    tabla = tabla_vigente()
+    predicciones = tabla.log_salario(discapacidad, X) if tabla is not None else None
+    if predicciones is None:
+        predicciones = motor_de(modelos_salario[discapacidad]).predecir(X)
+    return predicciones
+
+
+def verificar_paridad(filas=20000, semilla=0, tolerancia=1e-5):
+    """Compara la tabla contra los modelos con perfiles aleatorios.
+
+    Los perfiles tienen cada discapacidad al azar, así que muchas filas de
+    salario traen más de una y deben quedar fuera de la malla.
+    """
+    tabla = tabla_vigente()
+    if tabla is None:
+        print("No hay una tabla vigente para los modelos actuales.")
+        return False
+
+    perfil = perfil_aleatorio(filas, semilla)
+    correcto = True
+    casos = [
+        (prestacion, ruta, COLUMNAS_PRESTACIONES, "cualquier_discapacidad", probabilidad_prestacion)
+        for prestacion, ruta in modelos_prestaciones.items()
+    ] + [
+        (discapacidad, ruta, COLUMNAS_SALARIO, discapacidad, log_salario)
+        for discapacidad, ruta in modelos_salario.items()
+    ]
+    for nombre, ruta, columnas, discapacidad, consultar in casos:
+        X = codificar(perfil, columnas)
+        esperado = motor_de(ruta).predecir(X)
+        indice = indices(X, columnas, discapacidad)
+        en_malla = indice >= 0
+        # Sólo están en la malla las filas sin otras discapacidades que la propia
+        otras = [c for c in DISCAPACIDADES if c in columnas and c != discapacidad]
+        malla_correcta = np.array_equal(en_malla, ~X[:, [columnas.index(c) for c in otras]].any(axis=1))
+        consulta = consultar(nombre, X[en_malla])
+        diferencia = max(
+            np.abs(consulta - esperado[en_malla]).max(initial=0),
+            np.abs(consultar(nombre, X) - esperado).max(),
+        )
+        correcto &= malla_correcta and diferencia <= tolerancia
+        print(f"{ruta}: {en_malla.sum()} filas en la malla, diferencia máxima {diferencia:.2e}, "
+              f"malla correcta: {malla_correcta}")
+    return bool(correcto)
+
+
+if __name__ == "__main__":
+    if "--verificar" in sys.argv[1:]:
+        sys.exit(0 if verificar_paridad() else 1)
+    inicio = time.perf_counter()
+    construir(
+        sys.argv[1] if len(sys.argv) > 1 else DIRECTORIO_TABLA,
+        al_avanzar=lambda tabla, edad: print(f"{tabla}: edad {edad} lista", flush=True),
+    )
+    print(f"Tabla construida en {time.perf_counter() - inicio:.1f} s")